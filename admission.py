@@ -0,0 +1,143 @@
+"""Admission control for student uploads.
+
+Every accepted document ends up as a Telegram download plus a Drive upload, so
+a single student sending many large files can starve everyone else. Uploads are
+admitted in two steps:
+
+* ``check`` runs as soon as the document arrives, before anything is
+  downloaded, and rejects files that are too large or users that exceed their
+  token-bucket rate.
+* ``reserve`` is held around the actual transfer and keeps the total bytes in
+  flight under a global budget. Waiters are served round-robin per user, so a
+  user with several queued files cannot jump ahead of others.
+"""
+
+import asyncio
+import time
+from collections import Counter, OrderedDict, deque
+from contextlib import asynccontextmanager
+
+
+class TokenBucket:
+    __slots__ = ("rate", "capacity", "tokens", "updated")
+
+    def __init__(self, rate, capacity):
+        self.rate = rate  # Tokens added per second
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = time.monotonic()
+
+    def try_take(self, cost=1):
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        if self.tokens >= cost:
+            self.tokens -= cost
+            return True
+        return False
+
+    def is_full(self):
+        return self.tokens + (time.monotonic() - self.updated) * self.rate >= self.capacity
+
+
+class AdmissionController:
+    def __init__(self, max_file_size, uploads_per_hour, burst, max_inflight_bytes):
+        if max_file_size > max_inflight_bytes:
+            raise ValueError("max_file_size must not exceed max_inflight_bytes")
+        self.max_file_size = max_file_size
+        self.max_inflight_bytes = max_inflight_bytes
+        self._rate = uploads_per_hour / 3600
+        self._burst = burst
+        self._buckets = {}
+        self._waiters = OrderedDict()  # user_id -> deque of (nbytes, future), in round-robin order
+        self.inflight_bytes = 0
+        self.inflight_uploads = 0
+        self.admitted = 0
+        self.rejected = Counter()
+
+    def check(self, user_id, file_size):
+        """Return a rejection message for this document, or None if it is admitted."""
+        if file_size is not None and file_size > self.max_file_size:
+            self.rejected["too_large"] += 1
+            return f"File is too large ({file_size / 1024 / 1024:.1f} MB). Limit is {self.max_file_size / 1024 / 1024:.0f} MB."
+
+        bucket = self._buckets.get(user_id)
+        if bucket is None:
+            self._prune_buckets()
+            bucket = self._buckets[user_id] = TokenBucket(self._rate, self._burst)
+        if not bucket.try_take():
+            self.rejected["rate_limited"] += 1
+            return "You are sending files too quickly. Please wait a while and try again."
+
+        self.admitted += 1
+        return None
+
+    def _prune_buckets(self):
+        # A full bucket carries no state, so idle users do not need to be remembered.
+        if len(self._buckets) > 10_000:
+            self._buckets = {user_id: bucket for user_id, bucket in self._buckets.items() if not bucket.is_full()}
+
+    @asynccontextmanager
+    async def reserve(self, user_id, nbytes):
+        """Hold ``nbytes`` of the global in-flight budget for the duration of the block."""
+        nbytes = min(nbytes or self.max_file_size, self.max_file_size)
+        future = asyncio.get_running_loop().create_future()
+        self._waiters.setdefault(user_id, deque()).append((nbytes, future))
+        self._dispatch()
+        try:
+            await future
+        except asyncio.CancelledError:
+            if future.done() and not future.cancelled():
+                self._release(nbytes)  # Granted and cancelled in the same tick
+            else:
+                self._discard_waiter(user_id, future)
+            raise
+
+        try:
+            yield
+        finally:
+            self._release(nbytes)
+
+    def _release(self, nbytes):
+        self.inflight_bytes -= nbytes
+        self.inflight_uploads -= 1
+        self._dispatch()
+
+    def _discard_waiter(self, user_id, future):
+        queue = self._waiters.get(user_id)
+        if queue is None:
+            return
+        for entry in queue:
+            if entry[1] is future:
+                queue.remove(entry)
+                break
+        if not queue:
+            del self._waiters[user_id]
+        self._dispatch()
+
+    def _dispatch(self):
+        """Grant the budget to waiting users in round-robin order."""
+        while self._waiters:
+            user_id, queue = next(iter(self._waiters.items()))
+            nbytes, future = queue[0]
+            if self.inflight_bytes + nbytes > self.max_inflight_bytes:
+                return  # The next user in line waits; later users may not overtake it.
+            queue.popleft()
+            del self._waiters[user_id]
+            if queue:
+                self._waiters[user_id] = queue  # Re-append: this user goes to the back of the line
+            self.inflight_bytes += nbytes
+            self.inflight_uploads += 1
+            future.set_result(None)
+
+    def metrics(self):
+        return {
+            "inflight_uploads": self.inflight_uploads,
+            "inflight_bytes": self.inflight_bytes,
+            "max_inflight_bytes": self.max_inflight_bytes,
+            "queued_uploads": sum(len(queue) for queue in self._waiters.values()),
+            "queued_users": len(self._waiters),
+            "admitted": self.admitted,
+            "rejected_too_large": self.rejected["too_large"],
+            "rejected_rate_limited": self.rejected["rate_limited"],
+        }
@@ -0,0 +1,399 @@
+"""Archive closed terms out of the live submissions sheet.
+
+The bot reads ``Sheet1!A2:E`` on every reload, and the sheet only grows, so
+closed terms are moved into local columnar archive files and removed from
+the sheet, and their Drive files are moved to ARCHIVE_DRIVE_FOLDER_ID. The
+live path then only touches the current term.
+
+Usage:
+    python archive.py archive --before 2025-01-20 --term 2024-fall
+    python archive.py query [--student NAME] [--teacher ID] [--from DATE] [--to DATE]
+
+Sheet schemas:
+    v1  student, file, time, url                (older layout, see backup.py history)
+    v2  student, file, time, url, teacher_id    (current layout)
+Rows are normalized to v2 when read, and each archived row remembers which
+schema it came from. v1 rows left in the sheet stay as they are: the Sheets
+API drops trailing empty cells, so padding them would not change anything.
+
+Archive file layout (``ARCHIVE_DIR/<term>.sbca``), all integers little endian:
+    b"SBCA" | u16 format version | u32 row count | u16 column count
+    per column: u8 name length | name | u8 kind | u32 byte length | zlib data
+Rows are sorted by submission time, so time ranges are found by bisection.
+``index.json`` records each file's row count, time span and teachers, so
+queries skip files that cannot match.
+"""
+
+import argparse
+import json
+import os
+import struct
+import zlib
+from array import array
+from bisect import bisect_left, bisect_right
+from datetime import datetime
+
+from dotenv import load_dotenv
+
+from google_clients import build_drive_service, build_sheets_service
+from records import Submission
+
+load_dotenv()
+
+GOOGLE_SHEET_ID = os.getenv("GOOGLE_SHEET_ID")
+ARCHIVE_DIR = os.getenv("ARCHIVE_DIR", os.path.join(os.getenv("STATE_DIR", "state"), "archive"))
+# Drive folder that archived files are moved into. Required for archiving: files
+# left in the live folder would be reloaded as submissions without a sheet row.
+ARCHIVE_DRIVE_FOLDER_ID = os.getenv("ARCHIVE_DRIVE_FOLDER_ID")
+GOOGLE_DRIVE_FOLDER_ID = os.getenv("GOOGLE_DRIVE_FOLDER_ID")
+
+MAGIC = b"SBCA"
+FORMAT_VERSION = 1
+SCHEMA_V1 = 1
+SCHEMA_V2 = 2
+NO_TEACHER = -1
+
+# Column kinds
+STRINGS = 1  # NUL separated UTF-8
+DICT_STRINGS = 2  # NUL separated dictionary followed by u32 indices
+INT64 = 3
+UINT8 = 4
+
+
+def normalize_row(row):
+    """Return ``(Submission, schema_version)`` for a sheet row, or None if it is unusable.
+
+    The Sheets API drops trailing empty cells, so a v2 row without a teacher id
+    looks like a v1 row; both mean "no teacher".
+    """
+    if len(row) < 4:
+        return None
+    user_name, file_name, submission_time, file_url = row[:4]
+    schema = SCHEMA_V2 if len(row) >= 5 else SCHEMA_V1
+    teacher_id = row[4] if schema == SCHEMA_V2 else ""
+    try:
+        teacher_id = int(teacher_id) if teacher_id else None
+    except ValueError:
+        teacher_id = None
+    return Submission(user_name, file_name, submission_time, file_url, teacher_id), schema
+
+
+def _encode_strings(values):
+    return "\0".join(values).encode("utf-8")
+
+
+def _decode_strings(data, count):
+    return data.decode("utf-8").split("\0") if count else []
+
+
+def _pack_column(name, kind, data):
+    compressed = zlib.compress(data, 9)
+    encoded_name = name.encode()
+    return struct.pack("<B", len(encoded_name)) + encoded_name + struct.pack("<BI", kind, len(compressed)) + compressed
+
+
+def write_archive(path, rows):
+    """Write ``[(Submission, schema_version)]`` to ``path`` as a columnar archive."""
+    rows = sorted(rows, key=lambda item: (item[0].submission_time or datetime.min, item[0].file_name))
+    records = [submission for submission, _ in rows]
+
+    dictionary = sorted({r.student_name for r in records})
+    positions = {name: i for i, name in enumerate(dictionary)}
+    student_data = struct.pack("<I", len(dictionary)) + _encode_strings(dictionary)
+    student_data += array("I", [positions[r.student_name] for r in records]).tobytes()
+
+    times = array("q", [int(r.submission_time.timestamp()) if r.submission_time else 0 for r in records])
+    teachers = array("q", [NO_TEACHER if r.teacher_id is None else r.teacher_id for r in records])
+    schemas = array("B", [schema for _, schema in rows])
+
+    columns = [
+        _pack_column("student_name", DICT_STRINGS, student_data),
+        _pack_column("file_name", STRINGS, _encode_strings([r.file_name for r in records])),
+        _pack_column("submission_time", INT64, times.tobytes()),
+        _pack_column("file_url", STRINGS, _encode_strings([r.file_url for r in records])),
+        _pack_column("teacher_id", INT64, teachers.tobytes()),
+        _pack_column("schema", UINT8, schemas.tobytes()),
+    ]
+
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(MAGIC + struct.pack("<HIH", FORMAT_VERSION, len(records), len(columns)))
+        for column in columns:
+            f.write(column)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+
+
+def read_columns(path):
+    """Read an archive file into a dict of column name -> list/array."""
+    with open(path, "rb") as f:
+        data = f.read()
+    if data[:4] != MAGIC:
+        raise ValueError(f"{path} is not a submission archive")
+    version, count, column_count = struct.unpack_from("<HIH", data, 4)
+    if version > FORMAT_VERSION:
+        raise ValueError(f"{path} uses archive format {version}, newer than this code")
+
+    offset = 12
+    columns = {"_count": count}
+    for _ in range(column_count):
+        (name_length,) = struct.unpack_from("<B", data, offset)
+        name = data[offset + 1 : offset + 1 + name_length].decode()
+        offset += 1 + name_length
+        kind, length = struct.unpack_from("<BI", data, offset)
+        offset += 5
+        raw = zlib.decompress(data[offset : offset + length])
+        offset += length
+
+        if kind == STRINGS:
+            columns[name] = _decode_strings(raw, count)
+        elif kind == DICT_STRINGS:
+            (size,) = struct.unpack_from("<I", raw)
+            indices = array("I")
+            indices.frombytes(raw[len(raw) - 4 * count :])
+            dictionary = _decode_strings(raw[4 : len(raw) - 4 * count], size)
+            columns[name] = [dictionary[i] for i in indices]
+        else:
+            values = array("q" if kind == INT64 else "B")
+            values.frombytes(raw)
+            columns[name] = values
+    return columns
+
+
+def read_archive(path):
+    """Yield ``(Submission, schema_version)`` for every row of an archive file."""
+    columns = read_columns(path)
+    for i in range(columns["_count"]):
+        teacher_id = columns["teacher_id"][i]
+        timestamp = columns["submission_time"][i]
+        yield (
+            Submission(
+                columns["student_name"][i],
+                columns["file_name"][i],
+                datetime.fromtimestamp(timestamp) if timestamp else None,
+                columns["file_url"][i],
+                None if teacher_id == NO_TEACHER else teacher_id,
+            ),
+            columns["schema"][i],
+        )
+
+
+def load_index(archive_dir=ARCHIVE_DIR):
+    try:
+        with open(os.path.join(archive_dir, "index.json"), encoding="utf-8") as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return {}
+
+
+def _save_index(index, archive_dir):
+    tmp_path = os.path.join(archive_dir, "index.json.tmp")
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(index, f, indent=1)
+    os.replace(tmp_path, os.path.join(archive_dir, "index.json"))
+
+
+def archive_term(rows, term, archive_dir=ARCHIVE_DIR):
+    """Add rows to the archive file of ``term`` (merging with existing rows) and index it."""
+    path = os.path.join(archive_dir, f"{term}.sbca")
+    merged = {}
+    if os.path.exists(path):
+        for submission, schema in read_archive(path):
+            merged[submission.file_name] = (submission, schema)
+    for submission, schema in rows:
+        merged[submission.file_name] = (submission, schema)
+    write_archive(path, merged.values())
+
+    # Read back before anything is deleted from the sheet.
+    written = read_columns(path)
+    if written["_count"] != len(merged):
+        raise IOError(f"Archive {path} has {written['_count']} rows, expected {len(merged)}")
+
+    times = [t for t in written["submission_time"] if t]
+    index = load_index(archive_dir)
+    index[term] = {
+        "file": os.path.basename(path),
+        "rows": len(merged),
+        "min_time": min(times, default=0),
+        "max_time": max(times, default=0),
+        "teachers": sorted({t for t in written["teacher_id"] if t != NO_TEACHER}),
+        "archived_at": datetime.now().isoformat(),
+    }
+    _save_index(index, archive_dir)
+    return path
+
+
+def _move_drive_files(file_names):
+    drive_service = build_drive_service()
+    moved = 0
+    page_token = None
+    while True:
+        result = drive_service.files().list(
+            q=f"'{GOOGLE_DRIVE_FOLDER_ID}' in parents and trashed = false",
+            fields="nextPageToken, files(id, name)",
+            pageSize=1000,
+            pageToken=page_token,
+        ).execute()
+        for file in result.get("files", []):
+            if file["name"] in file_names:
+                drive_service.files().update(
+                    fileId=file["id"],
+                    addParents=ARCHIVE_DRIVE_FOLDER_ID,
+                    removeParents=GOOGLE_DRIVE_FOLDER_ID,
+                    supportsAllDrives=True,
+                ).execute()
+                moved += 1
+        page_token = result.get("nextPageToken")
+        if not page_token:
+            return moved
+
+
+def _sheet_id(sheets_service, title="Sheet1"):
+    spreadsheet = sheets_service.spreadsheets().get(
+        spreadsheetId=GOOGLE_SHEET_ID, fields="sheets.properties(sheetId,title)"
+    ).execute()
+    for sheet in spreadsheet["sheets"]:
+        if sheet["properties"]["title"] == title:
+            return sheet["properties"]["sheetId"]
+    raise ValueError(f"The spreadsheet has no sheet named {title}")
+
+
+def _row_runs(row_indices):
+    """Group 0-based row indices into ``(start, end)`` runs, bottom-most first."""
+    runs = []
+    for index in sorted(row_indices, reverse=True):
+        if runs and runs[-1][0] == index + 1:
+            runs[-1][0] = index
+        else:
+            runs.append([index, index + 1])
+    return runs
+
+
+def _read_rows(sheets_service):
+    return sheets_service.spreadsheets().values().get(
+        spreadsheetId=GOOGLE_SHEET_ID, range="Sheet1!A2:E"
+    ).execute().get("values", [])
+
+
+def archive_closed_terms(before, term, archive_dir=ARCHIVE_DIR):
+    """Move every row submitted before ``before`` into the archive of ``term``.
+
+    The bot keeps appending rows while this runs, so only the archived rows are
+    deleted, by row index. Appends land below them and never shift those
+    indices. Rows are checked again just before the delete, and nothing is
+    deleted if any archived row has moved or changed.
+    """
+    if not ARCHIVE_DRIVE_FOLDER_ID:
+        raise ValueError("ARCHIVE_DRIVE_FOLDER_ID must be set to archive a term.")
+    sheets_service = build_sheets_service()
+    rows = _read_rows(sheets_service)
+
+    # Rows that cannot be parsed or dated stay in the live sheet untouched.
+    # Sheet row indices are 0-based and row 0 is the header, so rows[i] is row i + 1.
+    closed, closed_rows = [], {}
+    for i, row in enumerate(rows):
+        normalized = normalize_row(row)
+        submission_time = normalized[0].submission_time if normalized else None
+        if submission_time is not None and submission_time < before:
+            closed.append(normalized)
+            closed_rows[i + 1] = row
+
+    if not closed:
+        print("Nothing to archive.")
+        return
+    path = archive_term(closed, term, archive_dir)
+
+    # The archive is on disk and verified. Archiving merges by file name, so a
+    # run aborted here can simply be repeated.
+    current = _read_rows(sheets_service)
+    if any(index - 1 >= len(current) or current[index - 1] != row for index, row in closed_rows.items()):
+        raise RuntimeError("The sheet changed while archiving; nothing was deleted. Run the command again.")
+
+    # Delete bottom-up so earlier deletions don't shift the rows still to delete.
+    sheet_id = _sheet_id(sheets_service)
+    sheets_service.spreadsheets().batchUpdate(
+        spreadsheetId=GOOGLE_SHEET_ID,
+        body={
+            "requests": [
+                {
+                    "deleteDimension": {
+                        "range": {"sheetId": sheet_id, "dimension": "ROWS", "startIndex": start, "endIndex": end}
+                    }
+                }
+                for start, end in _row_runs(closed_rows)
+            ]
+        },
+    ).execute()
+
+    moved = _move_drive_files({submission.file_name for submission, _ in closed})
+
+    v1_rows = sum(schema == SCHEMA_V1 for _, schema in closed)
+    print(
+        f"Archived {len(closed)} rows ({v1_rows} in the v1 layout) to {path}; "
+        f"{len(rows) - len(closed)} rows remain live, {moved} Drive files moved."
+    )
+
+
+def query(student=None, teacher_id=None, start=None, end=None, archive_dir=ARCHIVE_DIR, limit=None):
+    """Return archived submissions matching all given filters, newest first."""
+    student = student.lower() if student else None
+    results = []
+    for term, entry in load_index(archive_dir).items():
+        if teacher_id is not None and teacher_id not in entry["teachers"]:
+            continue
+        if start and entry["max_time"] and entry["max_time"] < start.timestamp():
+            continue
+        if end and entry["min_time"] and entry["min_time"] > end.timestamp():
+            continue
+
+        columns = read_columns(os.path.join(archive_dir, entry["file"]))
+        times = columns["submission_time"]
+        lo = bisect_left(times, int(start.timestamp())) if start else 0
+        hi = bisect_right(times, int(end.timestamp())) if end else len(times)
+        for i in range(lo, hi):
+            if teacher_id is not None and columns["teacher_id"][i] != teacher_id:
+                continue
+            if student and student not in columns["student_name"][i].lower():
+                continue
+            results.append(
+                Submission(
+                    columns["student_name"][i],
+                    columns["file_name"][i],
+                    datetime.fromtimestamp(times[i]) if times[i] else None,
+                    columns["file_url"][i],
+                    None if columns["teacher_id"][i] == NO_TEACHER else columns["teacher_id"][i],
+                )
+            )
+    results.sort(key=lambda s: s.submission_time or datetime.min, reverse=True)
+    return results[:limit] if limit else results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Archive closed terms of the submissions sheet.")
+    parser.add_argument("--archive-dir", default=ARCHIVE_DIR)
+    commands = parser.add_subparsers(dest="command", required=True)
+    archive_parser = commands.add_parser("archive", help="move rows before a date into a term archive")
+    archive_parser.add_argument("--before", required=True, help="first day of the current term (YYYY-MM-DD)")
+    archive_parser.add_argument("--term", required=True, help="name of the closed term, e.g. 2024-fall")
+    query_parser = commands.add_parser("query", help="search archived submissions")
+    query_parser.add_argument("--student")
+    query_parser.add_argument("--teacher", type=int)
+    query_parser.add_argument("--from", dest="start")
+    query_parser.add_argument("--to", dest="end")
+    args = parser.parse_args()
+
+    if args.command == "archive":
+        if not all([GOOGLE_SHEET_ID, GOOGLE_DRIVE_FOLDER_ID, ARCHIVE_DRIVE_FOLDER_ID]):
+            raise ValueError("Missing required environment variables.")
+        archive_closed_terms(datetime.strptime(args.before, "%Y-%m-%d"), args.term, args.archive_dir)
+    else:
+        start = datetime.strptime(args.start, "%Y-%m-%d") if args.start else None
+        end = datetime.strptime(args.end, "%Y-%m-%d").replace(hour=23, minute=59, second=59) if args.end else None
+        for s in query(args.student, args.teacher, start, end, args.archive_dir):
+            print(f"{s.submission_time_text}\t{s.student_name}\t{s.file_name}\t{s.teacher_id or ''}\t{s.file_url}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,274 +1,279 @@
+"""Incremental backup of the submission Drive folder and the submissions Sheet.
+
+Usage:
+    python backup.py run                      # take a snapshot
+    python backup.py list                     # list snapshots
+    python backup.py restore OUT_DIR [--at 20240131T230000]
+
+Each run asks Drive only for what changed since the previous run (using a
+change page token) and downloads files whose content hash is not in the local
+object store yet. Snapshots are gzip-compressed JSON manifests that point into
+the content-addressed store, so any snapshot can be restored on its own.
+
+Layout of BACKUP_DIR:
+    objects/ab/ab12...        file contents, named by md5 (Drive) or sha256 (Sheet)
+    manifests/<stamp>.json.gz one manifest per snapshot
+    state.json                change token and the current file listing
+"""
+
+import argparse
+import gzip
+import hashlib
+import json
 import os
-import io
-import asyncio
+import shutil
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from datetime import datetime
+
 from dotenv import load_dotenv
-from telegram import Update
-from telegram.ext import Application, CommandHandler, MessageHandler, filters, CallbackContext
-from googleapiclient.discovery import build
-from googleapiclient.http import MediaIoBaseUpload, MediaIoBaseDownload
-from google.oauth2.service_account import Credentials
-import time
-
-# Load environment variables
+
+from google_clients import build_drive_service, build_sheets_service, thread_drive_service
+
 load_dotenv()
 
-TOKEN = os.getenv("BOT_TOKEN")
 GOOGLE_DRIVE_FOLDER_ID = os.getenv("GOOGLE_DRIVE_FOLDER_ID")
 GOOGLE_SHEET_ID = os.getenv("GOOGLE_SHEET_ID")
-ADMIN_TELEGRAM_IDS = list(map(int, os.getenv("ADMIN_TELEGRAM_IDS", "").split(",")))
+BACKUP_DIR = os.getenv("BACKUP_DIR", "backups")
+BACKUP_WORKERS = int(os.getenv("BACKUP_WORKERS", "4"))
 
-if not all([TOKEN, GOOGLE_DRIVE_FOLDER_ID, GOOGLE_SHEET_ID]):
-    raise ValueError("Missing required environment variables.")
+FILE_FIELDS = "id, name, md5Checksum, size, modifiedTime, mimeType, parents, trashed"
+STAMP_FORMAT = "%Y%m%dT%H%M%S"
 
-teachers = {}
-submissions = {}
 
-def get_google_credentials():
-    return Credentials.from_service_account_file(
-        'service-account.json',
-        scopes=[
-            'https://www.googleapis.com/auth/drive',
-            'https://www.googleapis.com/auth/spreadsheets'
-        ]
-    )
+def object_path(digest, backup_dir=BACKUP_DIR):
+    return os.path.join(backup_dir, "objects", digest[:2], digest)
+
+
+def _write_atomic(path, data):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(data)
+    os.replace(tmp_path, path)
+
 
-def load_submissions_from_sheet():
-    local_submissions = {}
-    creds = get_google_credentials()
-    sheets_service = build('sheets', 'v4', credentials=creds)
-
-    for attempt in range(3):
-        try:
-            result = sheets_service.spreadsheets().values().get(
-                spreadsheetId=GOOGLE_SHEET_ID, range="Sheet1!A2:D"
-            ).execute()
-            rows = result.get('values', [])
-            for row in rows:
-                if len(row) >= 4:
-                    user_name, file_name, submission_time, file_url = row[:4]
-                    local_submissions[file_name] = {
-                        'student_name': user_name,
-                        'file_name': file_name,
-                        'submission_time': submission_time,
-                        'file_url': file_url
-                    }
-            break
-        except Exception as e:
-            print(f"Sheet load attempt {attempt+1} failed: {e}")
-            time.sleep(2)
-    
-    return local_submissions
-
-def load_submissions_from_drive():
-    local_submissions = {}
-    creds = get_google_credentials()
-    drive_service = build('drive', 'v3', credentials=creds)
-    
+def load_state(backup_dir=BACKUP_DIR):
     try:
-        results = drive_service.files().list(
-            q=f"'{GOOGLE_DRIVE_FOLDER_ID}' in parents",
-            fields="files(id, name, webViewLink, mimeType)",
-            pageSize=100
-        ).execute()
-        
-        for file in results.get('files', []):
-            local_submissions[file['name']] = {
-                'file_id': file['id'],
-                'file_url': file['webViewLink'],
-                'file_name': file['name'],
-                'mime_type': file['mimeType']
-            }
-    except Exception as e:
-        print(f"Drive load error: {e}")
-    
-    return local_submissions
-
-def load_all_submissions():
-    sheet_subs = load_submissions_from_sheet()
-    drive_subs = load_submissions_from_drive()
-    
-    combined = {}
-    # Merge drive data with sheet data
-    for name, data in drive_subs.items():
-        combined[name] = {
-            'student_name': sheet_subs.get(name, {}).get('student_name', 'Unknown Student'),
-            'file_name': name,
-            'submission_time': sheet_subs.get(name, {}).get('submission_time', 'Unknown Time'),
-            'file_url': data['file_url'],
-            'file_id': data['file_id'],
-            'mime_type': data['mime_type']
-        }
-    return combined
-
-async def upload_to_google_drive(file, file_name):
-    creds = get_google_credentials()
-    drive_service = build('drive', 'v3', credentials=creds)
-    
-    telegram_file = await file.get_file()
-    file_data = await telegram_file.download_as_bytearray()
-    
-    file_metadata = {
-        'name': file_name,
-        'parents': [GOOGLE_DRIVE_FOLDER_ID]
+        with open(os.path.join(backup_dir, "state.json"), encoding="utf-8") as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return {"page_token": None, "files": {}}
+
+
+def save_state(state, backup_dir=BACKUP_DIR):
+    _write_atomic(os.path.join(backup_dir, "state.json"), json.dumps(state).encode())
+
+
+def _file_entry(file):
+    return {
+        "name": file["name"],
+        "md5": file.get("md5Checksum"),
+        "size": int(file.get("size", 0)),
+        "modified": file.get("modifiedTime"),
+        "mime_type": file.get("mimeType"),
     }
-    
-    media = MediaIoBaseUpload(io.BytesIO(file_data), mimetype=file.mime_type)
-    
-    uploaded_file = drive_service.files().create(
-        body=file_metadata,
-        media_body=media,
-        fields='id, webViewLink',
-        supportsAllDrives=True
-    ).execute()
-    
-    # Set public permissions
-    drive_service.permissions().create(
-        fileId=uploaded_file['id'],
-        body={'type': 'anyone', 'role': 'reader'}
-    ).execute()
-    
-    return uploaded_file['webViewLink']
-
-async def append_submission_to_sheet(user_name, file_name, submission_time, file_url):
-    creds = get_google_credentials()
-    sheets_service = build('sheets', 'v4', credentials=creds)
-    
-    values = [[user_name, file_name, submission_time, file_url]]
-    
-    try:
-        sheets_service.spreadsheets().values().append(
-            spreadsheetId=GOOGLE_SHEET_ID,
-            range="Sheet1!A2:D",
-            valueInputOption="USER_ENTERED",
-            body={'values': values}
+
+
+def list_folder(drive_service):
+    """Full listing of the submission folder, used for the first run only."""
+    files = {}
+    page_token = None
+    while True:
+        result = drive_service.files().list(
+            q=f"'{GOOGLE_DRIVE_FOLDER_ID}' in parents and trashed = false",
+            fields=f"nextPageToken, files({FILE_FIELDS})",
+            pageSize=1000,
+            pageToken=page_token,
         ).execute()
-    except Exception as e:
-        print(f"Sheet append error: {e}")
-
-def download_file_from_drive(file_id):
-    """
-    Download file bytes from Google Drive using MediaIoBaseDownload.
-    """
-    creds = get_google_credentials()
-    drive_service = build('drive', 'v3', credentials=creds)
-    request = drive_service.files().get_media(fileId=file_id)
-    fh = io.BytesIO()
-    downloader = MediaIoBaseDownload(fh, request)
-    done = False
-    while not done:
-        status, done = downloader.next_chunk()
-    fh.seek(0)
-    return fh
-
-async def start(update: Update, context: CallbackContext):
-    user_id = update.message.from_user.id
-    if user_id in ADMIN_TELEGRAM_IDS:
-        await update.message.reply_text("Admin commands:\n/register_teacher <ID>\n/view_submissions")
-    elif user_id in teachers:
-        await update.message.reply_text("Teacher commands:\n/view_submissions")
+        for file in result.get("files", []):
+            files[file["id"]] = _file_entry(file)
+        page_token = result.get("nextPageToken")
+        if not page_token:
+            return files
+
+
+def apply_changes(drive_service, state):
+    """Apply Drive changes since ``state["page_token"]`` and return the new token."""
+    page_token = state["page_token"]
+    changed = 0
+    while True:
+        result = drive_service.changes().list(
+            pageToken=page_token,
+            fields=f"nextPageToken, newStartPageToken, changes(fileId, removed, file({FILE_FIELDS}))",
+            includeRemoved=True,
+            pageSize=1000,
+        ).execute()
+        for change in result.get("changes", []):
+            file = change.get("file")
+            in_folder = file and not file.get("trashed") and GOOGLE_DRIVE_FOLDER_ID in file.get("parents", [])
+            if change.get("removed") or not in_folder:
+                if state["files"].pop(change["fileId"], None) is not None:
+                    changed += 1
+            else:
+                state["files"][file["id"]] = _file_entry(file)
+                changed += 1
+        if "newStartPageToken" in result:
+            print(f"Applied {changed} Drive changes")
+            return result["newStartPageToken"]
+        page_token = result["nextPageToken"]
+
+
+def download_object(file_id, md5, backup_dir=BACKUP_DIR):
+    """Download one Drive file into the object store, verifying its md5."""
+    from googleapiclient.http import MediaIoBaseDownload
+
+    path = object_path(md5, backup_dir)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = f"{path}.{threading.get_ident()}.part"
+    request = thread_drive_service().files().get_media(fileId=file_id)
+    with open(tmp_path, "wb") as fh:
+        downloader = MediaIoBaseDownload(fh, request, chunksize=8 * 1024 * 1024)
+        done = False
+        while not done:
+            _, done = downloader.next_chunk()
+
+    digest = hashlib.md5()
+    with open(tmp_path, "rb") as fh:
+        while chunk := fh.read(1024 * 1024):
+            digest.update(chunk)
+    if digest.hexdigest() != md5:
+        os.remove(tmp_path)
+        raise ValueError(f"Checksum mismatch for {file_id}")
+    os.replace(tmp_path, path)
+    return os.path.getsize(path)
+
+
+def backup_sheet(backup_dir=BACKUP_DIR):
+    """Store the whole submissions sheet as JSON and return its sha256."""
+    result = build_sheets_service().spreadsheets().values().get(
+        spreadsheetId=GOOGLE_SHEET_ID, range="Sheet1"
+    ).execute()
+    data = json.dumps(result.get("values", []), ensure_ascii=False, separators=(",", ":")).encode()
+    digest = hashlib.sha256(data).hexdigest()
+    path = object_path(digest, backup_dir)
+    if not os.path.exists(path):
+        _write_atomic(path, data)
+    return digest
+
+
+def run_backup(backup_dir=BACKUP_DIR, workers=BACKUP_WORKERS):
+    started = datetime.now()
+    state = load_state(backup_dir)
+    drive_service = build_drive_service()
+
+    if state["page_token"] is None:
+        # Take the token before listing so nothing changed during the listing is missed.
+        new_token = drive_service.changes().getStartPageToken().execute()["startPageToken"]
+        state["files"] = list_folder(drive_service)
+        print(f"Initial listing: {len(state['files'])} files")
     else:
-        await update.message.reply_text("Please submit your assignment file.")
+        new_token = apply_changes(drive_service, state)
 
-async def handle_document(update: Update, context: CallbackContext):
-    try:
-        file = update.message.document
-        user = update.message.from_user
-        file_name = file.file_name
-        
-        if file_name in submissions:
-            await update.message.reply_text(f"⚠️ {file_name} already exists in submissions.")
-            return
-        
-        # Upload to Drive
-        file_url = await upload_to_google_drive(file, file_name)
-        
-        # Update Sheet
-        submission_time = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-        await append_submission_to_sheet(user.full_name, file_name, submission_time, file_url)
-        
-        # Update local cache
-        submissions[file_name] = {
-            'student_name': user.full_name,
-            'file_name': file_name,
-            'submission_time': submission_time,
-            'file_url': file_url
-        }
-        
-        await update.message.reply_text(f"✅ {file_name} submitted successfully!")
-
-    except Exception as e:
-        await update.message.reply_text(f"❌ Submission failed: {str(e)[:200]}")
-
-async def register_teacher(update: Update, context: CallbackContext):
-    if update.message.from_user.id not in ADMIN_TELEGRAM_IDS:
-        await update.message.reply_text("⛔ Permission denied.")
-        return
-    
-    try:
-        teacher_id = int(context.args[0])
-        teachers[teacher_id] = {'registered_at': datetime.now()}
-        await update.message.reply_text(f"👨🏫 Teacher {teacher_id} registered successfully.")
-    except (IndexError, ValueError):
-        await update.message.reply_text("❌ Usage: /register_teacher <TELEGRAM_ID>")
-
-async def view_submissions(update: Update, context: CallbackContext):
-    global submissions
-    submissions = load_all_submissions()
-    
-    if not submissions:
-        await update.message.reply_text("📭 No submissions found.")
-        return
-    
-    success_count = 0
-    for file_data in submissions.values():
-        try:
-            # Instead of sending a URL, download the file from Drive and send it as a file object.
-            file_bytes = download_file_from_drive(file_data['file_id'])
-            
-            caption = (
-                f"📄 {file_data['file_name']}\n"
-                f"👤 Student: {file_data['student_name']}\n"
-                f"⏰ Submitted: {file_data['submission_time']}\n"
-                f"🔗 {file_data['file_url']}"
-            )
-            
-            await update.message.reply_document(
-                document=file_bytes,
-                filename=file_data['file_name'],
-                caption=caption,
-                read_timeout=30,
-                connect_timeout=30,
-                write_timeout=30
-            )
-            success_count += 1
-            await asyncio.sleep(1.5)
-            
-        except Exception as e:
-            error_msg = f"⚠️ Failed to display {file_data['file_name']}: {str(e)[:200]}"
-            await update.message.reply_text(error_msg)
-    
-    await update.message.reply_text(
-        f"📊 Results:\n"
-        f"• Successfully shown: {success_count}\n"
-        f"• Total submissions: {len(submissions)}"
+    missing = {}
+    for file_id, entry in state["files"].items():
+        if not entry["md5"]:
+            print(f"Skipping {entry['name']}: Google-native documents have no content hash")
+        elif not os.path.exists(object_path(entry["md5"], backup_dir)):
+            missing.setdefault(entry["md5"], file_id)  # Identical content is fetched once
+
+    transferred = 0
+    failed = []
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        futures = {pool.submit(download_object, file_id, md5, backup_dir): md5 for md5, file_id in missing.items()}
+        for future in as_completed(futures):
+            md5 = futures[future]
+            try:
+                transferred += future.result()
+            except Exception as e:
+                failed.append(md5)
+                file_id = missing[md5]
+                print(f"Download of {state['files'][file_id]['name']} failed: {e}")
+
+    sheet_digest = backup_sheet(backup_dir)
+
+    manifest = {
+        "created_at": started.isoformat(),
+        "folder_id": GOOGLE_DRIVE_FOLDER_ID,
+        "sheet": sheet_digest,
+        "files": {
+            file_id: [entry["name"], entry["md5"], entry["size"], entry["modified"]]
+            for file_id, entry in state["files"].items()
+            if entry["md5"] and entry["md5"] not in failed
+        },
+    }
+    stamp = started.strftime(STAMP_FORMAT)
+    _write_atomic(
+        os.path.join(backup_dir, "manifests", f"{stamp}.json.gz"),
+        gzip.compress(json.dumps(manifest, separators=(",", ":")).encode()),
     )
 
+    # Failed files stay in the listing without an object, so the next run retries them.
+    state["page_token"] = new_token
+    save_state(state, backup_dir)
+
+    elapsed = (datetime.now() - started).total_seconds()
+    print(
+        f"Snapshot {stamp}: {len(manifest['files'])} files, {len(missing) - len(failed)} downloaded "
+        f"({transferred / 1024 / 1024:.1f} MiB), {len(failed)} failed, {elapsed:.1f}s"
+    )
+    return stamp
+
+
+def list_snapshots(backup_dir=BACKUP_DIR):
+    manifest_dir = os.path.join(backup_dir, "manifests")
+    if not os.path.isdir(manifest_dir):
+        return []
+    return sorted(name[: -len(".json.gz")] for name in os.listdir(manifest_dir) if name.endswith(".json.gz"))
+
+
+def load_manifest(stamp, backup_dir=BACKUP_DIR):
+    with gzip.open(os.path.join(backup_dir, "manifests", f"{stamp}.json.gz"), "rt", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def restore(out_dir, at=None, backup_dir=BACKUP_DIR):
+    """Restore the latest snapshot taken at or before ``at`` (a STAMP_FORMAT string)."""
+    snapshots = [stamp for stamp in list_snapshots(backup_dir) if at is None or stamp <= at]
+    if not snapshots:
+        raise SystemExit("No snapshot found for the requested time.")
+    stamp = snapshots[-1]
+    manifest = load_manifest(stamp, backup_dir)
+
+    files_dir = os.path.join(out_dir, "files")
+    os.makedirs(files_dir, exist_ok=True)
+    used_names = set()
+    for file_id, (name, md5, _, _) in manifest["files"].items():
+        # Drive allows duplicate names; keep both copies apart on disk.
+        target_name = name if name not in used_names else f"{file_id}_{name}"
+        used_names.add(target_name)
+        shutil.copyfile(object_path(md5, backup_dir), os.path.join(files_dir, target_name))
+    shutil.copyfile(object_path(manifest["sheet"], backup_dir), os.path.join(out_dir, "sheet.json"))
+    print(f"Restored snapshot {stamp}: {len(manifest['files'])} files to {out_dir}")
+
+
 def main():
-    application = Application.builder().token(TOKEN).build()
-    
-    # Add handlers
-    application.add_handler(CommandHandler("start", start))
-    application.add_handler(CommandHandler("register_teacher", register_teacher))
-    application.add_handler(CommandHandler("view_submissions", view_submissions))
-    application.add_handler(MessageHandler(filters.Document.ALL, handle_document))
-    
-    # Load initial submissions
-    global submissions
-    submissions = load_all_submissions()
-    
-    # Start bot
-    application.run_polling()
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--backup-dir", default=BACKUP_DIR)
+    commands = parser.add_subparsers(dest="command", required=True)
+    run_parser = commands.add_parser("run", help="take an incremental snapshot")
+    run_parser.add_argument("--workers", type=int, default=BACKUP_WORKERS)
+    commands.add_parser("list", help="list snapshots")
+    restore_parser = commands.add_parser("restore", help="restore a snapshot")
+    restore_parser.add_argument("out_dir")
+    restore_parser.add_argument("--at", help=f"restore the state as of this time ({STAMP_FORMAT})")
+    args = parser.parse_args()
+
+    if args.command == "run":
+        if not all([GOOGLE_DRIVE_FOLDER_ID, GOOGLE_SHEET_ID]):
+            raise ValueError("Missing required environment variables.")
+        run_backup(args.backup_dir, args.workers)
+    elif args.command == "list":
+        for stamp in list_snapshots(args.backup_dir):
+            print(stamp)
+    else:
+        restore(args.out_dir, args.at, args.backup_dir)
+
 
 if __name__ == "__main__":
     main()
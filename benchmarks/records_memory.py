@@ -0,0 +1,82 @@
+"""Compare the memory footprint of dict-based and slotted submission records.
+
+Usage: python benchmarks/records_memory.py [N]
+"""
+
+import os
+import sys
+import tracemalloc
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from records import TIME_FORMAT, Submission  # noqa: E402
+
+STUDENTS = [f"Student {i}" for i in range(300)]
+TEACHER_IDS = list(range(1000, 1020))
+START = datetime(2024, 1, 1, 8, 0, 0)
+
+
+def sheet_rows(n):
+    """Yield rows the way the Sheets API returns them: freshly allocated strings."""
+    for i in range(n):
+        yield [
+            "".join(STUDENTS[i % len(STUDENTS)]),
+            f"assignment_{i}.pdf",
+            (START + timedelta(minutes=i)).strftime(TIME_FORMAT),
+            f"https://drive.google.com/file/d/{i:033d}/view",
+            str(TEACHER_IDS[i % len(TEACHER_IDS)]),
+        ]
+
+
+def as_dicts(n):
+    return {
+        file_name: {
+            "student_name": user_name,
+            "file_name": file_name,
+            "submission_time": submission_time,
+            "file_url": file_url,
+            "teacher_id": int(teacher_id),
+            "file_id": f"{file_name}-id",
+            "mime_type": "".join("application/pdf"),
+        }
+        for user_name, file_name, submission_time, file_url, teacher_id in sheet_rows(n)
+    }
+
+
+def as_records(n):
+    return {
+        file_name: Submission(
+            user_name,
+            file_name,
+            submission_time,
+            file_url,
+            int(teacher_id),
+            file_id=f"{file_name}-id",
+            mime_type="".join("application/pdf"),
+        )
+        for user_name, file_name, submission_time, file_url, teacher_id in sheet_rows(n)
+    }
+
+
+def measure(build, n):
+    tracemalloc.start()
+    data = build(n)
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del data
+    return current
+
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 50_000
+    before = measure(as_dicts, n)
+    after = measure(as_records, n)
+    print(f"{n} submissions")
+    print(f"dict records:    {before / n:8.1f} bytes/record ({before / 1024 / 1024:.1f} MiB)")
+    print(f"slotted records: {after / n:8.1f} bytes/record ({after / 1024 / 1024:.1f} MiB)")
+    print(f"saved: {100 * (1 - after / before):.1f}%")
+
+
+if __name__ == "__main__":
+    main()
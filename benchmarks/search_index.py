@@ -0,0 +1,59 @@
+"""Build a SubmissionIndex over synthetic submissions and time typical queries.
+
+Usage: python benchmarks/search_index.py [N]
+"""
+
+import os
+import random
+import sys
+import time
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from records import Submission  # noqa: E402
+from search import SubmissionIndex  # noqa: E402
+
+FIRST_NAMES = ["Abebe", "Almaz", "Bekele", "Chaltu", "Dawit", "Eden", "Fikru", "Genet", "Hana", "Kebede"]
+LAST_NAMES = ["Tesfaye", "Girma", "Alemu", "Haile", "Mekonnen", "Tadesse", "Wolde", "Bekele"]
+SUBJECTS = ["essay", "lab_report", "homework", "project", "presentation", "quiz"]
+TERM_START = datetime(2024, 9, 2)
+QUERIES = ["abebe week 3", "chaltu essay", "lab report 2024-10-01", "kebede from:2024-09-10 to:2024-09-20", "ayana"]
+
+
+def make_submissions(n):
+    rng = random.Random(42)
+    for i in range(n):
+        student = f"{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)}"
+        submitted = TERM_START + timedelta(minutes=rng.randrange(16 * 7 * 24 * 60))
+        yield Submission(
+            student,
+            f"{rng.choice(SUBJECTS)}_{i}_{student.split()[0].lower()}.pdf",
+            submitted,
+            f"https://drive.google.com/file/d/{i}/view",
+            1000 + rng.randrange(20),
+        )
+
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+    records = list(make_submissions(n))
+
+    index = SubmissionIndex(TERM_START)
+    for teacher_id in range(1000, 1020):
+        index.set_teacher(teacher_id, f"Teacher {teacher_id}")
+    started = time.perf_counter()
+    index.sync({record.file_name: record for record in records})
+    print(f"indexed {len(index)} submissions in {time.perf_counter() - started:.2f}s")
+
+    for query in QUERIES:
+        runs = 20
+        started = time.perf_counter()
+        for _ in range(runs):
+            results = index.search(query)
+        elapsed = (time.perf_counter() - started) / runs
+        print(f"{query!r:45} {len(results):3} results  {elapsed * 1000:7.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
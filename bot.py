@@ -1,7 +1,15 @@
+import time
+
+_PROCESS_START = time.perf_counter()
+
 import os
 import io
+import json
 import asyncio
-from datetime import datetime
+import tempfile
+import zipfile
+from datetime import datetime, time as dt_time
+from zoneinfo import ZoneInfo
 from dotenv import load_dotenv
 from telegram import Update, InlineKeyboardButton, InlineKeyboardMarkup
 from telegram.ext import (
@@ -11,11 +19,20 @@ from telegram.ext import (
     filters,
     CallbackContext,
     CallbackQueryHandler,
+    TypeHandler,
 )
-from googleapiclient.discovery import build
-from googleapiclient.http import MediaIoBaseUpload, MediaIoBaseDownload
-from google.oauth2.service_account import Credentials
-import time
+import archive
+import tracing
+from admission import AdmissionController
+from delivery import DeliveryCheckpoint
+from digest import DigestScheduler
+from executors import BoundedExecutor
+from google_clients import thread_drive_service, thread_sheets_service
+from range_download import RangeDownload
+from records import TIME_FORMAT, Submission, Teacher
+from search import SubmissionIndex
+
+IMPORT_SECONDS = time.perf_counter() - _PROCESS_START
 
 # Load environment variables
 load_dotenv()
@@ -25,70 +42,123 @@ GOOGLE_DRIVE_FOLDER_ID = os.getenv("GOOGLE_DRIVE_FOLDER_ID")
 GOOGLE_SHEET_ID = os.getenv("GOOGLE_SHEET_ID")
 ADMIN_TELEGRAM_IDS = list(map(int, os.getenv("ADMIN_TELEGRAM_IDS", "").split(",")))
 
+# Bots may upload at most 50 MB per file; keep some headroom for ZIP metadata.
+EXPORT_VOLUME_SIZE = int(os.getenv("EXPORT_VOLUME_SIZE", 48 * 1024 * 1024))
+EXPORT_CONCURRENCY = int(os.getenv("EXPORT_CONCURRENCY", "4"))
+
+# Upload admission control. Bots cannot download files over 20 MB from Telegram anyway.
+MAX_UPLOAD_BYTES = int(os.getenv("MAX_UPLOAD_BYTES", 20 * 1024 * 1024))
+UPLOADS_PER_HOUR = float(os.getenv("UPLOADS_PER_HOUR", "20"))
+UPLOAD_BURST = int(os.getenv("UPLOAD_BURST", "5"))
+MAX_INFLIGHT_UPLOAD_BYTES = int(os.getenv("MAX_INFLIGHT_UPLOAD_BYTES", 100 * 1024 * 1024))
+
+# Dedicated thread pools for blocking Google calls: (workers, queued calls, timeout in seconds)
+DRIVE_EXECUTOR = BoundedExecutor(
+    "drive",
+    max_workers=int(os.getenv("DRIVE_WORKERS", "4")),
+    max_queue=int(os.getenv("DRIVE_QUEUE", "16")),
+    timeout=float(os.getenv("DRIVE_TIMEOUT", "300")),
+)
+SHEETS_EXECUTOR = BoundedExecutor(
+    "sheets",
+    max_workers=int(os.getenv("SHEETS_WORKERS", "2")),
+    max_queue=int(os.getenv("SHEETS_QUEUE", "16")),
+    timeout=float(os.getenv("SHEETS_TIMEOUT", "30")),
+)
+# Drive media downloads get their own pool, so uploads never queue behind them.
+DOWNLOAD_EXECUTOR = BoundedExecutor(
+    "download",
+    max_workers=int(os.getenv("DOWNLOAD_THREADS", "4")),
+    max_queue=int(os.getenv("DOWNLOAD_QUEUE", "32")),
+    timeout=float(os.getenv("DRIVE_TIMEOUT", "300")),
+)
+
+# Set to a file path to record updates and Bot API calls for loadtest.py.
+RECORD_SESSION = os.getenv("RECORD_SESSION")
+
+# Per-submission traces: JSON lines in STATE_DIR, plus an OTLP/HTTP collector if configured.
+TRACE_FILE = os.getenv("TRACE_FILE", os.path.join(os.getenv("STATE_DIR", "state"), "traces.jsonl"))
+OTEL_EXPORTER_OTLP_ENDPOINT = os.getenv("OTEL_EXPORTER_OTLP_ENDPOINT")
+
+# Optional first day of term (YYYY-MM-DD) so /search understands "week 3".
+TERM_START_DATE = os.getenv("TERM_START_DATE")
+
+# Last known teachers/submissions, used to serve updates while Google loads.
+STATE_DIR = os.getenv("STATE_DIR", "state")
+SNAPSHOT_PATH = os.path.join(STATE_DIR, "snapshot.json")
+# New submissions are saved to the snapshot in one write at most this many seconds later.
+SNAPSHOT_DELAY = float(os.getenv("SNAPSHOT_DELAY", "5"))
+# Partial downloads are kept here so they can resume after a failure or restart.
+DOWNLOAD_DIR = os.path.join(STATE_DIR, "downloads")
+# Concurrent range requests per download; all downloads share DOWNLOAD_THREADS.
+DOWNLOAD_WORKERS = max(1, min(int(os.getenv("DOWNLOAD_WORKERS", "2")), DOWNLOAD_EXECUTOR.max_workers))
+# Seconds between edits of a chat's download progress message.
+PROGRESS_INTERVAL = float(os.getenv("PROGRESS_INTERVAL", "5"))
+# Per-chat /view_submissions checkpoints, and how many files to download ahead of sending.
+DELIVERY_DIR = os.path.join(STATE_DIR, "deliveries")
+DELIVERY_PREFETCH = int(os.getenv("DELIVERY_PREFETCH", "2"))
+
+# Daily teacher digest, as HH:MM in DIGEST_TIMEZONE (UTC if unset).
+DIGEST_TIME = os.getenv("DIGEST_TIME", "18:00")
+DIGEST_TIMEZONE = os.getenv("DIGEST_TIMEZONE", "UTC")
+
 if not all([TOKEN, GOOGLE_DRIVE_FOLDER_ID, GOOGLE_SHEET_ID]):
     raise ValueError("Missing required environment variables.")
 
 # Global storage
-teachers = {}  # Format: {teacher_id: {"name": "Teacher Name", "registered_at": datetime}}
-submissions = {}  # Format: {file_name: {student_name, file_name, submission_time, file_url, teacher_id}}
+teachers = {}  # Format: {teacher_id: Teacher}
+submissions = {}  # Format: {file_name: Submission}
 teacher_selection = {}  # Temporary storage for student-teacher selection
+uploading = set()  # File names whose upload is in progress
+active_deliveries = {}  # chat_id -> running /view_submissions, /export_submissions or /digest_now task
+_first_update_seen = False
+_snapshot_lock = asyncio.Lock()  # One snapshot write at a time, in the order they were requested
+_snapshot_timer = None  # Pending debounced snapshot save
+recent_submissions = {}  # file_name -> Submission made here that a refresh has not yet seen in the Sheet
 
-# Cache credentials to avoid reloading on every call.
-_GOOGLE_CREDENTIALS = None
+search_index = SubmissionIndex(datetime.strptime(TERM_START_DATE, "%Y-%m-%d") if TERM_START_DATE else None)
+admission = AdmissionController(MAX_UPLOAD_BYTES, UPLOADS_PER_HOUR, UPLOAD_BURST, MAX_INFLIGHT_UPLOAD_BYTES)
 
 
-def get_google_credentials():
-    global _GOOGLE_CREDENTIALS
-    if _GOOGLE_CREDENTIALS is None:
-        _GOOGLE_CREDENTIALS = Credentials.from_service_account_file(
-            "service-account.json",
-            scopes=[
-                "https://www.googleapis.com/auth/drive",
-                "https://www.googleapis.com/auth/spreadsheets",
-            ],
-        )
-    return _GOOGLE_CREDENTIALS
-
-
-def load_submissions_from_sheet():
+def _read_sheet():
+    result = thread_sheets_service().spreadsheets().values().get(
+        spreadsheetId=GOOGLE_SHEET_ID, range="Sheet1!A2:E"
+    ).execute()
     local_submissions = {}
-    creds = get_google_credentials()
-    sheets_service = build("sheets", "v4", credentials=creds)
+    for row in result.get("values", []):
+        # Accepts both the old 4-column and the current 5-column layout
+        normalized = archive.normalize_row(row)
+        if normalized:
+            submission = normalized[0]
+            local_submissions[submission.file_name] = submission
+    return local_submissions
 
+
+async def load_submissions_from_sheet():
+    """Read the submissions sheet; raises if every attempt fails."""
     for attempt in range(3):
         try:
-            result = sheets_service.spreadsheets().values().get(
-                spreadsheetId=GOOGLE_SHEET_ID, range="Sheet1!A2:E"
-            ).execute()
-            rows = result.get("values", [])
-            for row in rows:
-                if len(row) >= 5:
-                    user_name, file_name, submission_time, file_url, teacher_id = row[:5]
-                    local_submissions[file_name] = {
-                        "student_name": user_name,
-                        "file_name": file_name,
-                        "submission_time": submission_time,
-                        "file_url": file_url,
-                        "teacher_id": int(teacher_id) if teacher_id else None,
-                    }
-            break
+            return await SHEETS_EXECUTOR.run(_read_sheet)
         except Exception as e:
             print(f"Sheet load attempt {attempt + 1} failed: {e}")
-            time.sleep(2)
-    return local_submissions
+            if attempt == 2:
+                raise
+            await asyncio.sleep(2)
 
 
-def load_submissions_from_drive():
+async def load_submissions_from_drive():
+    """List the submission folder; raises rather than returning a partial listing."""
     local_submissions = {}
-    creds = get_google_credentials()
-    drive_service = build("drive", "v3", credentials=creds)
-
-    try:
-        results = drive_service.files().list(
-            q=f"'{GOOGLE_DRIVE_FOLDER_ID}' in parents",
-            fields="files(id, name, webViewLink, mimeType)",
-            pageSize=100,
-        ).execute()
+    page_token = None
+    while True:
+        results = await DRIVE_EXECUTOR.run(
+            lambda: thread_drive_service().files().list(
+                q=f"'{GOOGLE_DRIVE_FOLDER_ID}' in parents",
+                fields="nextPageToken, files(id, name, webViewLink, mimeType)",
+                pageSize=1000,
+                pageToken=page_token,
+            ).execute()
+        )
         for file in results.get("files", []):
             local_submissions[file["name"]] = {
                 "file_id": file["id"],
@@ -96,93 +166,324 @@ def load_submissions_from_drive():
                 "file_name": file["name"],
                 "mime_type": file["mimeType"],
             }
-    except Exception as e:
-        print(f"Drive load error: {e}")
-    return local_submissions
+        page_token = results.get("nextPageToken")
+        if not page_token:
+            return local_submissions
 
 
-def load_all_submissions():
-    sheet_subs = load_submissions_from_sheet()
-    drive_subs = load_submissions_from_drive()
+def combine_submissions(sheet_subs, drive_subs):
     combined = {}
     # Merge drive data with sheet data
     for name, data in drive_subs.items():
-        combined[name] = {
-            "student_name": sheet_subs.get(name, {}).get("student_name", "Unknown Student"),
-            "file_name": name,
-            "submission_time": sheet_subs.get(name, {}).get("submission_time", "Unknown Time"),
-            "file_url": data["file_url"],
-            "file_id": data["file_id"],
-            "mime_type": data["mime_type"],
-            "teacher_id": sheet_subs.get(name, {}).get("teacher_id", None),
-        }
+        sheet_sub = sheet_subs.get(name)
+        combined[name] = Submission(
+            sheet_sub.student_name if sheet_sub else "Unknown Student",
+            name,
+            sheet_sub.raw_submission_time if sheet_sub else None,
+            data["file_url"],
+            teacher_id=sheet_sub.teacher_id if sheet_sub else None,
+            file_id=data["file_id"],
+            mime_type=data["mime_type"],
+        )
     return combined
 
 
+def replace_submissions(new_submissions):
+    """Swap in a freshly loaded set of submissions and update the search index."""
+    global submissions
+    submissions = new_submissions
+    search_index.sync(submissions)
+
+
+def snapshot_state():
+    return {
+        "saved_at": datetime.now().isoformat(),
+        "teachers": {str(teacher_id): teacher.to_dict() for teacher_id, teacher in teachers.items()},
+        "submissions": [submission.to_dict() for submission in submissions.values()],
+    }
+
+
+def write_snapshot(snapshot):
+    os.makedirs(STATE_DIR, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=STATE_DIR, prefix="snapshot.", suffix=".tmp")
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump(snapshot, f, ensure_ascii=False)
+        os.replace(tmp_path, SNAPSHOT_PATH)  # Atomic, so a crash never leaves half a snapshot
+    except BaseException:
+        os.remove(tmp_path)
+        raise
+
+
+async def save_snapshot():
+    """Persist teachers and submissions so the next start can serve them immediately.
+
+    The snapshot is built here on the event loop, where nothing else can modify
+    the dicts meanwhile; only the file write runs in a thread. Errors are logged.
+    """
+    snapshot = snapshot_state()
+    async with _snapshot_lock:
+        try:
+            await asyncio.to_thread(write_snapshot, snapshot)
+        except Exception as e:
+            print(f"Snapshot save error: {e}")
+
+
+def schedule_snapshot():
+    """Save the snapshot after SNAPSHOT_DELAY, coalescing a burst of submissions into one write."""
+    global _snapshot_timer
+    if _snapshot_timer is not None:
+        return
+
+    async def save_later():
+        global _snapshot_timer
+        await asyncio.sleep(SNAPSHOT_DELAY)
+        _snapshot_timer = None  # Later changes schedule another save
+        await save_snapshot()
+
+    _snapshot_timer = asyncio.get_running_loop().create_task(save_later())
+
+
+def load_snapshot():
+    try:
+        with open(SNAPSHOT_PATH, encoding="utf-8") as f:
+            snapshot = json.load(f)
+    except FileNotFoundError:
+        return
+    except (OSError, ValueError) as e:
+        print(f"Snapshot load error: {e}")
+        return
+
+    for teacher_id, teacher in snapshot.get("teachers", {}).items():
+        teachers[int(teacher_id)] = Teacher.from_dict(teacher)
+        search_index.set_teacher(int(teacher_id), teachers[int(teacher_id)].name)
+    replace_submissions({data["file_name"]: Submission.from_dict(data) for data in snapshot.get("submissions", [])})
+    print(f"Loaded snapshot from {snapshot.get('saved_at')}: {len(teachers)} teachers, {len(submissions)} submissions")
+
+
+async def refresh_submissions():
+    """Reload submissions from Google on the dedicated executors and merge them into the current state.
+
+    If the Sheet or Drive cannot be read, the current data is kept. Submissions
+    made by this process that the Sheet did not return yet (made while the
+    reload ran, or whose append failed) are kept as they are.
+    """
+    started = time.perf_counter()
+    try:
+        # Sheet first: a row is appended after its upload, so Drive then lists every file it names.
+        sheet_subs = await load_submissions_from_sheet()
+        drive_subs = await load_submissions_from_drive()
+    except Exception as e:
+        print(f"Background refresh failed, keeping current data: {e}")
+        return
+
+    refreshed = combine_submissions(sheet_subs, drive_subs)
+    for file_name, submission in list(recent_submissions.items()):
+        if file_name in sheet_subs:
+            del recent_submissions[file_name]  # Google has caught up
+        else:
+            refreshed[file_name] = submission
+    replace_submissions(refreshed)
+    await save_snapshot()
+    print(f"Background refresh finished in {time.perf_counter() - started:.2f}s: {len(submissions)} submissions")
+
+
 async def upload_to_google_drive(file, file_name):
-    creds = get_google_credentials()
-    drive_service = build("drive", "v3", credentials=creds)
-    telegram_file = await file.get_file()
-    file_data = await telegram_file.download_as_bytearray()
+    with tracing.span("telegram.get_file"):
+        telegram_file = await file.get_file()
+    with tracing.span("telegram.download") as span:
+        file_data = await telegram_file.download_as_bytearray()
+        span.set(bytes=len(file_data))
+
+    from googleapiclient.http import MediaIoBaseUpload
 
     file_metadata = {"name": file_name, "parents": [GOOGLE_DRIVE_FOLDER_ID]}
     media = MediaIoBaseUpload(io.BytesIO(file_data), mimetype=file.mime_type, chunksize=256 * 1024)
 
-    uploaded_file = await asyncio.to_thread(
-        lambda: drive_service.files().create(
-            body=file_metadata, media_body=media, fields="id, webViewLink", supportsAllDrives=True
-        ).execute()
-    )
+    with tracing.span("drive.create", bytes=len(file_data)):
+        uploaded_file = await DRIVE_EXECUTOR.run(
+            lambda: thread_drive_service().files().create(
+                body=file_metadata, media_body=media, fields="id, webViewLink", supportsAllDrives=True
+            ).execute()
+        )
 
-    await asyncio.to_thread(
-        lambda: drive_service.permissions().create(
-            fileId=uploaded_file["id"], body={"type": "anyone", "role": "reader"}
-        ).execute()
-    )
+    with tracing.span("drive.permissions"):
+        await DRIVE_EXECUTOR.run(
+            lambda: thread_drive_service().permissions().create(
+                fileId=uploaded_file["id"], body={"type": "anyone", "role": "reader"}
+            ).execute()
+        )
     return uploaded_file["webViewLink"]
 
 
 async def append_submission_to_sheet(user_name, file_name, submission_time, file_url, teacher_id):
-    creds = get_google_credentials()
-    sheets_service = build("sheets", "v4", credentials=creds)
+    """Append one submission row; raises if the append fails or times out.
+
+    There is a single attempt: append is not idempotent, and a call that timed
+    out may still complete in its worker thread, so a retry could add the row twice.
+    """
     values = [[user_name, file_name, submission_time, file_url, teacher_id]]
-    try:
-        await asyncio.to_thread(
-            lambda: sheets_service.spreadsheets().values().append(
+    with tracing.span("sheets.append"):
+        await SHEETS_EXECUTOR.run(
+            lambda: thread_sheets_service().spreadsheets().values().append(
                 spreadsheetId=GOOGLE_SHEET_ID,
                 range="Sheet1!A2:E",
                 valueInputOption="USER_ENTERED",
                 body={"values": values},
             ).execute()
         )
-    except Exception as e:
-        print(f"Sheet append error: {e}")
 
 
-async def download_file_from_drive(file_id):
-    """Download file bytes from Google Drive using MediaIoBaseDownload asynchronously."""
+class _SharedDownload:
+    __slots__ = ("task", "waiters", "listeners")
+
+    def __init__(self):
+        self.task = None
+        self.waiters = 0
+        self.listeners = []  # Progress callbacks of every waiting caller
+
+    def progress(self, done_bytes, total_bytes, bytes_per_second):
+        for listener in list(self.listeners):
+            listener(done_bytes, total_bytes, bytes_per_second)
+
 
-    def _download():
-        creds = get_google_credentials()
-        drive_service = build("drive", "v3", credentials=creds)
-        request = drive_service.files().get_media(fileId=file_id)
-        fh = io.BytesIO()
-        downloader = MediaIoBaseDownload(fh, request, chunksize=256 * 1024)
-        done = False
-        while not done:
-            status, done = downloader.next_chunk()
-        fh.seek(0)
-        return fh
+_downloads = {}  # file_id -> _SharedDownload in flight
+
+
+async def _download_to_disk(file_id, shared):
+    download = RangeDownload(
+        DOWNLOAD_EXECUTOR, file_id, os.path.join(DOWNLOAD_DIR, file_id), workers=DOWNLOAD_WORKERS, progress=shared.progress
+    )
+    with tracing.span("drive.download", file_id=file_id) as span:
+        started = time.perf_counter()
+        path = await download.run()
+        elapsed = time.perf_counter() - started
+        span.set(
+            bytes=download.size,
+            retries=download.retries,
+            mib_per_second=round(download.size / 1024 / 1024 / max(elapsed, 1e-6), 2),
+        )
+    return path
 
-    return await asyncio.to_thread(_download)
+
+async def download_file_from_drive(file_id, progress=None):
+    """Download a Drive file with parallel range requests and return it as an open binary file.
+
+    Concurrent calls for the same file (digest, /view_submissions, exports)
+    share one download, each getting its own file handle. The download is
+    cancelled once no caller is waiting for it any more.
+
+    The caller is responsible for closing the returned file.
+    """
+    shared = _downloads.get(file_id)
+    if shared is None:
+        shared = _downloads[file_id] = _SharedDownload()
+        shared.task = asyncio.create_task(_download_to_disk(file_id, shared))
+    shared.waiters += 1
+    if progress:
+        shared.listeners.append(progress)
+    try:
+        path = await asyncio.shield(shared.task)
+        return open(path, "rb")
+    finally:
+        shared.waiters -= 1
+        if progress:
+            shared.listeners.remove(progress)
+        if shared.waiters == 0:
+            if _downloads.get(file_id) is shared:
+                del _downloads[file_id]
+            if not shared.task.done():
+                shared.task.cancel()
+            elif not shared.task.cancelled() and shared.task.exception() is None:
+                os.remove(shared.task.result())  # Open handles keep the data readable until closed
+
+
+class TransferStatus:
+    """One chat message showing the progress of that chat's running downloads.
+
+    Downloads report through ``callback(label)``. The message is edited at most
+    every PROGRESS_INTERVAL seconds, so it only appears for transfers that take
+    that long.
+    """
+
+    def __init__(self, message):
+        self.message = message
+        self.transfers = {}  # label -> (done bytes, total bytes, bytes per second)
+        self.status = None
+        self.last_update = time.monotonic()
+        self._edit = None
+
+    def callback(self, label):
+        def progress(done_bytes, total_bytes, bytes_per_second):
+            if done_bytes >= total_bytes:
+                self.transfers.pop(label, None)
+            else:
+                self.transfers[label] = (done_bytes, total_bytes, bytes_per_second)
+            self._refresh()
+
+        return progress
+
+    def forget(self, label):
+        """Drop a transfer that failed or was cancelled before completing."""
+        self.transfers.pop(label, None)
+
+    def _refresh(self):
+        now = time.monotonic()
+        if not self.transfers or now - self.last_update < PROGRESS_INTERVAL or (self._edit and not self._edit.done()):
+            return
+        self.last_update = now
+        lines = [
+            f"⬇️ {label}: {done / total:.0%} of {total / 1024 / 1024:.1f} MiB at {rate / 1024 / 1024:.1f} MiB/s"
+            for label, (done, total, rate) in self.transfers.items()
+        ]
+        self._edit = asyncio.create_task(self._show("\n".join(lines)))
+
+    async def _show(self, text):
+        try:
+            if self.status is None:
+                self.status = await self.message.reply_text(text)
+            else:
+                await self.status.edit_text(text)
+        except Exception as e:
+            print(f"Progress update failed: {e}")
+
+    async def finish(self):
+        if self._edit:
+            await self._edit
+        if self.status is not None:
+            await self._show("⬇️ All downloads finished.")
+
+
+async def current_submissions():
+    """Refresh from Google and return the up-to-date submissions for the digest."""
+    await refresh_submissions()
+    return submissions
+
+
+digest_scheduler = DigestScheduler(
+    os.path.join(STATE_DIR, "digest.json"), current_submissions, lambda: teachers, download_file_from_drive
+)
+
+
+async def record_first_update(update: Update, context: CallbackContext):
+    global _first_update_seen
+    if not _first_update_seen:
+        _first_update_seen = True
+        print(f"Time to first update: {time.perf_counter() - _PROCESS_START:.2f}s")
 
 
 async def start(update: Update, context: CallbackContext):
     user_id = update.message.from_user.id
     if user_id in ADMIN_TELEGRAM_IDS:
-        await update.message.reply_text("Admin commands:\n/register_teacher <ID> <NAME>\n/view_submissions")
+        await update.message.reply_text(
+            "Admin commands:\n/register_teacher <ID> <NAME>\n/view_submissions [restart]\n/cancel\n/search <QUERY>\n/history <QUERY>\n"
+            "/export_submissions [teacher:<ID>] [from:YYYY-MM-DD] [to:YYYY-MM-DD]\n/digest_now\n/metrics"
+        )
     elif user_id in teachers:
-        await update.message.reply_text("Teacher commands:\n/view_submissions")
+        await update.message.reply_text(
+            "Teacher commands:\n/view_submissions [restart]\n/cancel\n/search <QUERY>\n/history <QUERY>\n"
+            "/export_submissions [from:YYYY-MM-DD] [to:YYYY-MM-DD]\n/digest_now"
+        )
     else:
         await update.message.reply_text("Please submit your assignment file.")
 
@@ -192,10 +493,16 @@ async def handle_document(update: Update, context: CallbackContext):
     file = update.message.document
     file_name = file.file_name
 
-    if file_name in submissions:
+    if file_name in submissions or file_name in uploading:
         await update.message.reply_text(f"⚠️ {file_name} already exists in submissions.")
         return
 
+    # Reject before anything is downloaded
+    rejection = admission.check(user_id, file.file_size)
+    if rejection:
+        await update.message.reply_text(f"⛔ {rejection}")
+        return
+
     # Store file info temporarily while waiting for teacher selection
     teacher_selection[user_id] = {"file": file, "file_name": file_name}
     await prompt_for_teacher_selection(update, context)
@@ -207,7 +514,7 @@ async def prompt_for_teacher_selection(update: Update, context: CallbackContext)
         return
 
     keyboard = [
-        [InlineKeyboardButton(teacher["name"], callback_data=f"teacher_{teacher_id}")]
+        [InlineKeyboardButton(teacher.name, callback_data=f"teacher_{teacher_id}")]
         for teacher_id, teacher in teachers.items()
     ]
     reply_markup = InlineKeyboardMarkup(keyboard)
@@ -221,38 +528,67 @@ async def handle_teacher_selection(update: Update, context: CallbackContext):
     user_id = query.from_user.id
     teacher_id = int(query.data.split("_")[1])
 
-    if user_id not in teacher_selection:
+    # Uploads run concurrently (the handler is non-blocking), so the selection is
+    # taken and the file name reserved without awaiting in between.
+    file_info = teacher_selection.pop(user_id, None)
+    if file_info is None:
         await query.edit_message_text("❌ Submission expired. Please try again.")
         return
 
-    file_info = teacher_selection[user_id]
     file = file_info["file"]
     file_name = file_info["file_name"]
+    if file_name in submissions or file_name in uploading:
+        await query.edit_message_text(f"⚠️ {file_name} already exists in submissions.")
+        return
+    uploading.add(file_name)
 
-    try:
-        # Upload to Drive
-        file_url = await upload_to_google_drive(file, file_name)
-
-        # Update Sheet
-        submission_time = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-        await append_submission_to_sheet(
-            query.from_user.full_name, file_name, submission_time, file_url, teacher_id
-        )
+    with tracing.trace(
+        "submission", file_name=file_name, user_id=user_id, teacher_id=teacher_id, bytes=file.file_size or 0
+    ) as submission_trace:
+        try:
+            # Upload to Drive, waiting for a share of the in-flight byte budget
+            waiting_since = time.perf_counter()
+            async with admission.reserve(user_id, file.file_size):
+                submission_trace.set(admission_wait=round(time.perf_counter() - waiting_since, 3))
+                file_url = await upload_to_google_drive(file, file_name)
 
-        # Update local cache
-        submissions[file_name] = {
-            "student_name": query.from_user.full_name,
-            "file_name": file_name,
-            "submission_time": submission_time,
-            "file_url": file_url,
-            "teacher_id": teacher_id,
-        }
+            # Update Sheet. The file is already in Drive, so a failure here is reported
+            # rather than retried or sent back to the student as a failed submission.
+            submission_time = datetime.now().replace(microsecond=0)
+            sheet_error = None
+            try:
+                await append_submission_to_sheet(
+                    query.from_user.full_name, file_name, submission_time.strftime(TIME_FORMAT), file_url, teacher_id
+                )
+            except Exception as e:
+                print(f"Sheet append error: {e}")
+                sheet_error = e
+                submission_trace.status = "error"
+                submission_trace.set(error=f"sheet: {e}"[:200])
 
-        await query.edit_message_text(f"✅ {file_name} submitted successfully to {teachers[teacher_id]['name']}!")
-    except Exception as e:
-        await query.edit_message_text(f"❌ Submission failed: {str(e)[:200]}")
-    finally:
-        del teacher_selection[user_id]  # Clean up
+            # Update local cache
+            submissions[file_name] = Submission(
+                query.from_user.full_name, file_name, submission_time, file_url, teacher_id
+            )
+            recent_submissions[file_name] = submissions[file_name]
+            search_index.add(submissions[file_name])
+        except Exception as e:
+            submission_trace.status = "error"
+            submission_trace.set(error=str(e)[:200])
+            await query.edit_message_text(
+                f"❌ Submission failed: {str(e)[:200]}\nReference: {submission_trace.trace_id[:12]}"
+            )
+        else:
+            schedule_snapshot()
+            if sheet_error is None:
+                await query.edit_message_text(f"✅ {file_name} submitted successfully to {teachers[teacher_id].name}!")
+            else:
+                await query.edit_message_text(
+                    f"⚠️ {file_name} was uploaded for {teachers[teacher_id].name}, but recording it in the "
+                    f"submissions sheet failed. Please tell an admin.\nReference: {submission_trace.trace_id[:12]}"
+                )
+        finally:
+            uploading.discard(file_name)
 
 
 async def register_teacher(update: Update, context: CallbackContext):
@@ -266,79 +602,485 @@ async def register_teacher(update: Update, context: CallbackContext):
         if not teacher_name:
             raise ValueError("Teacher name is required.")
 
-        teachers[teacher_id] = {"name": teacher_name, "registered_at": datetime.now()}
+        teachers[teacher_id] = Teacher(teacher_name, datetime.now())
+        search_index.set_teacher(teacher_id, teacher_name)
+        digest_scheduler.watch(teacher_id)
+        await save_snapshot()
         await update.message.reply_text(f"👨🏫 Teacher {teacher_name} (ID: {teacher_id}) registered successfully.")
     except (IndexError, ValueError) as e:
         await update.message.reply_text(f"❌ Usage: /register_teacher <TELEGRAM_ID> <TEACHER_NAME>")
 
 
+async def search_submissions(update: Update, context: CallbackContext):
+    user_id = update.message.from_user.id
+
+    if user_id not in ADMIN_TELEGRAM_IDS and user_id not in teachers:
+        await update.message.reply_text("⛔ You don't have permission to search submissions.")
+        return
+
+    query = " ".join(context.args).strip()
+    if not query:
+        await update.message.reply_text(
+            "❌ Usage: /search <words> [YYYY-MM-DD] [from:YYYY-MM-DD] [to:YYYY-MM-DD] [week N]"
+        )
+        return
+
+    # Teachers only ever see their own submissions.
+    teacher_id = None if user_id in ADMIN_TELEGRAM_IDS else user_id
+    try:
+        results = search_index.search(query, teacher_id=teacher_id)
+    except ValueError:
+        await update.message.reply_text("❌ Dates must be written as YYYY-MM-DD.")
+        return
+
+    if not results:
+        await update.message.reply_text("📭 No matching submissions.")
+        return
+
+    lines = [
+        f"📄 {s.file_name} — 👤 {s.student_name} — ⏰ {s.submission_time_text}\n🔗 {s.file_url}" for s in results
+    ]
+    # Stay under Telegram's 4096 character message limit.
+    await update.message.reply_text((f"🔎 {len(results)} result(s):\n\n" + "\n\n".join(lines))[:4000])
+
+
+async def digest_now(update: Update, context: CallbackContext):
+    user_id = update.message.from_user.id
+
+    if user_id in ADMIN_TELEGRAM_IDS:
+        teacher_ids = None  # Everyone's digest
+    elif user_id in teachers:
+        teacher_ids = [user_id]
+    else:
+        await update.message.reply_text("⛔ Permission denied.")
+        return
+
+    if await reply_if_busy(update):
+        return
+    start_chat_task(update, context, send_digest_now(update.message, context.bot, teacher_ids))
+
+
+async def send_digest_now(message, bot, teacher_ids):
+    delivered = await digest_scheduler.run(bot, teacher_ids)
+    total = sum(delivered.values())
+    await message.reply_text(f"📬 Digest sent: {total} new submission(s) to {len(delivered)} teacher(s).")
+
+
+async def search_history(update: Update, context: CallbackContext):
+    user_id = update.message.from_user.id
+
+    if user_id not in ADMIN_TELEGRAM_IDS and user_id not in teachers:
+        await update.message.reply_text("⛔ You don't have permission to search the archive.")
+        return
+
+    try:
+        history_filters = parse_export_filters([arg for arg in context.args if ":" in arg])
+    except ValueError:
+        history_filters = None
+    student = " ".join(arg for arg in context.args if ":" not in arg) or None
+    if history_filters is None or not (student or any(history_filters.values())):
+        await update.message.reply_text(
+            "❌ Usage: /history [STUDENT NAME] [teacher:<ID>] [from:YYYY-MM-DD] [to:YYYY-MM-DD]"
+        )
+        return
+
+    # Teachers only ever see their own submissions.
+    if user_id not in ADMIN_TELEGRAM_IDS:
+        history_filters["teacher_id"] = user_id
+
+    results = await asyncio.to_thread(archive.query, student, limit=20, **history_filters)
+    if not results:
+        await update.message.reply_text("📭 No archived submissions found.")
+        return
+
+    lines = [
+        f"📄 {s.file_name} — 👤 {s.student_name} — ⏰ {s.submission_time_text}\n🔗 {s.file_url}" for s in results
+    ]
+    await update.message.reply_text((f"🗄 {len(results)} archived result(s):\n\n" + "\n\n".join(lines))[:4000])
+
+
+async def show_metrics(update: Update, context: CallbackContext):
+    if update.message.from_user.id not in ADMIN_TELEGRAM_IDS:
+        await update.message.reply_text("⛔ Permission denied.")
+        return
+
+    metrics = {
+        **admission.metrics(),
+        **DRIVE_EXECUTOR.metrics(),
+        **SHEETS_EXECUTOR.metrics(),
+        **DOWNLOAD_EXECUTOR.metrics(),
+    }
+    lines = [f"• {name}: {value}" for name, value in metrics.items()]
+    await update.message.reply_text("📈 Upload metrics:\n" + "\n".join(lines))
+
+
+async def reply_if_busy(update: Update):
+    if update.effective_chat.id in active_deliveries:
+        await update.message.reply_text("⏳ Still working on your previous request here. Use /cancel to stop it.")
+        return True
+    return False
+
+
+def start_chat_task(update: Update, context: CallbackContext, coroutine):
+    """Run long work for a chat in the background, so other updates keep being
+    handled meanwhile and /cancel can stop it."""
+    chat_id = update.effective_chat.id
+    task = context.application.create_task(coroutine, update=update)
+    active_deliveries[chat_id] = task
+    task.add_done_callback(lambda _: active_deliveries.pop(chat_id, None))
+
+
 async def view_submissions(update: Update, context: CallbackContext):
     user_id = update.message.from_user.id
+    chat_id = update.effective_chat.id
 
     # Authorization check
     if user_id not in ADMIN_TELEGRAM_IDS and user_id not in teachers:
         await update.message.reply_text("⛔ You don't have permission to view submissions.")
         return
 
-    global submissions
-    submissions = load_all_submissions()
+    if await reply_if_busy(update):
+        return
 
-    # Filter submissions for teachers
-    if user_id in teachers and user_id not in ADMIN_TELEGRAM_IDS:
-        filtered = {k: v for k, v in submissions.items() if v["teacher_id"] == user_id}
-    else:
-        filtered = submissions  # Admins see all
+    checkpoint = DeliveryCheckpoint.load(DELIVERY_DIR, chat_id)
+    if context.args and context.args[0] == "restart":
+        checkpoint.clear()
 
-    if not filtered:
-        await update.message.reply_text("📭 No submissions found.")
+    # Teachers see their own submissions, admins see all
+    teacher_id = None if user_id in ADMIN_TELEGRAM_IDS else user_id
+    start_chat_task(update, context, deliver_submissions(update.message, checkpoint, teacher_id))
+
+
+async def deliver_submissions(message, checkpoint, teacher_id=None):
+    await refresh_submissions()
+    selected = filter_submissions(submissions, teacher_id=teacher_id)
+    if not selected:
+        await message.reply_text("📭 No submissions found.")
         return
 
+    pending = [file_data for file_data in selected if not checkpoint.is_delivered(file_data)]
+    already_delivered = len(selected) - len(pending)
+    if already_delivered:
+        await message.reply_text(
+            f"↩️ Resuming: {already_delivered} of {len(selected)} submissions were already sent.\n"
+            "Use /view_submissions restart to start over."
+        )
+
+    # Downloads run a few files ahead of the sender so Drive and Telegram overlap.
+    downloads = {}
+    transfer_status = TransferStatus(message)
     success_count = 0
-    for file_data in filtered.values():
-        try:
-            file_bytes = await download_file_from_drive(file_data["file_id"])
-            caption = (
-                f"📄 {file_data['file_name']}\n"
-                f"👤 Student: {file_data['student_name']}\n"
-                f"⏰ Submitted: {file_data['submission_time']}\n"
-                f"🔗 {file_data['file_url']}"
-            )
-            await update.message.reply_document(
-                document=file_bytes,
-                filename=file_data["file_name"],
-                caption=caption,
-                read_timeout=30,
+    try:
+        for i, file_data in enumerate(pending):
+            for j in range(i, min(i + DELIVERY_PREFETCH + 1, len(pending))):
+                if j not in downloads:
+                    downloads[j] = asyncio.create_task(
+                        download_file_from_drive(pending[j].file_id, transfer_status.callback(pending[j].file_name))
+                    )
+            try:
+                try:
+                    file_bytes = await downloads.pop(i)
+                finally:
+                    transfer_status.forget(file_data.file_name)
+                caption = (
+                    f"📄 {file_data.file_name}\n"
+                    f"👤 Student: {file_data.student_name}\n"
+                    f"⏰ Submitted: {file_data.submission_time_text}\n"
+                    f"🔗 {file_data.file_url}"
+                )
+                with file_bytes:
+                    await message.reply_document(
+                        document=file_bytes,
+                        filename=file_data.file_name,
+                        caption=caption,
+                        read_timeout=30,
+                        connect_timeout=30,
+                        write_timeout=30,
+                    )
+                checkpoint.mark_delivered(file_data)
+                success_count += 1
+                await asyncio.sleep(1)
+            except Exception as e:
+                error_msg = f"⚠️ Failed to display {file_data.file_name}: {str(e)[:200]}"
+                await message.reply_text(error_msg)
+    finally:
+        # On cancellation, stop prefetches and close files that were never sent.
+        for download in downloads.values():
+            if download.done() and not download.cancelled() and download.exception() is None:
+                download.result().close()
+            else:
+                download.cancel()
+
+    await transfer_status.finish()
+    if success_count == len(pending):
+        checkpoint.clear()  # Complete; the next /view_submissions starts from scratch
+    await message.reply_text(
+        f"📊 Results:\n• Successfully shown: {success_count}\n"
+        f"• Sent earlier: {already_delivered}\n• Total submissions: {len(selected)}"
+    )
+
+
+async def cancel(update: Update, context: CallbackContext):
+    task = active_deliveries.get(update.effective_chat.id)
+    if task is None:
+        await update.message.reply_text("Nothing to cancel.")
+        return
+
+    task.cancel()
+    await update.message.reply_text(
+        "🛑 Stopped. /view_submissions and /digest_now continue where they stopped when run again."
+    )
+
+
+def parse_export_filters(args):
+    """Parse ``teacher:<ID> from:<date> to:<date>`` arguments of /export_submissions."""
+    filters_ = {"teacher_id": None, "start": None, "end": None}
+    for arg in args:
+        key, _, value = arg.partition(":")
+        if key == "teacher":
+            filters_["teacher_id"] = int(value)
+        elif key == "from":
+            filters_["start"] = datetime.strptime(value, "%Y-%m-%d")
+        elif key == "to":
+            # Inclusive end date: everything before the following midnight.
+            filters_["end"] = datetime.strptime(value, "%Y-%m-%d").replace(hour=23, minute=59, second=59)
+        else:
+            raise ValueError(f"Unknown filter: {arg}")
+    return filters_
+
+
+def filter_submissions(all_submissions, teacher_id=None, start=None, end=None):
+    selected = []
+    for file_data in all_submissions.values():
+        if teacher_id is not None and file_data.teacher_id != teacher_id:
+            continue
+        if start or end:
+            submitted = file_data.submission_time
+            if submitted is None:
+                continue  # Unknown times cannot satisfy a date range
+            if (start and submitted < start) or (end and submitted > end):
+                continue
+        selected.append(file_data)
+    return selected
+
+
+class ZipVolumeWriter:
+    """Write files into a sequence of ZIP archives, each below ``volume_size`` bytes.
+
+    Every volume is a standalone archive spooled to a temporary file on disk, so
+    only the file currently being written is held in memory.
+    """
+
+    def __init__(self, prefix, volume_size=EXPORT_VOLUME_SIZE):
+        self.prefix = prefix
+        self.volume_size = volume_size
+        self.volumes = []  # Finished volumes: [(filename, file object)]
+        self._file = None
+        self._zip = None
+
+    def _open_volume(self):
+        self._file = tempfile.TemporaryFile()
+        self._zip = zipfile.ZipFile(self._file, "w", compression=zipfile.ZIP_DEFLATED)
+
+    def _close_volume(self):
+        self._zip.close()
+        self._file.seek(0)
+        self.volumes.append((f"{self.prefix}_part{len(self.volumes) + 1}.zip", self._file))
+        self._zip = self._file = None
+
+    def add(self, arcname, fh, size):
+        """Append ``fh`` to the current volume, starting a new one if it would overflow."""
+        # Deflate never grows data by more than a few bytes per block, so the raw
+        # size plus header overhead is a safe upper bound for the entry.
+        entry_size = size + len(arcname.encode()) * 2 + 512
+        if entry_size > self.volume_size:
+            raise ValueError(f"{arcname} is larger than the archive volume limit")
+        if self._zip is not None and self._file.tell() + entry_size > self.volume_size:
+            self._close_volume()
+        if self._zip is None:
+            self._open_volume()
+        with self._zip.open(arcname, "w", force_zip64=True) as dest:
+            while chunk := fh.read(1024 * 1024):
+                dest.write(chunk)
+
+    def close(self):
+        if self._zip is not None:
+            self._close_volume()
+        return self.volumes
+
+
+async def export_submissions(update: Update, context: CallbackContext):
+    user_id = update.message.from_user.id
+
+    if user_id not in ADMIN_TELEGRAM_IDS and user_id not in teachers:
+        await update.message.reply_text("⛔ You don't have permission to export submissions.")
+        return
+
+    try:
+        export_filters = parse_export_filters(context.args)
+    except ValueError:
+        await update.message.reply_text(
+            "❌ Usage: /export_submissions [teacher:<ID>] [from:YYYY-MM-DD] [to:YYYY-MM-DD]"
+        )
+        return
+
+    # Teachers can only ever export their own submissions.
+    if user_id not in ADMIN_TELEGRAM_IDS:
+        export_filters["teacher_id"] = user_id
+
+    if await reply_if_busy(update):
+        return
+    start_chat_task(update, context, run_export(update.message, export_filters))
+
+
+async def run_export(message, export_filters):
+    await refresh_submissions()
+    selected = filter_submissions(submissions, **export_filters)
+
+    if not selected:
+        await message.reply_text("📭 No submissions found.")
+        return
+
+    await message.reply_text(f"📦 Exporting {len(selected)} submissions...")
+
+    # Downloads run concurrently, but the bounded queue keeps at most a couple of
+    # finished files waiting for the (single) archive writer at any time.
+    pending = asyncio.Queue()
+    for file_data in selected:
+        pending.put_nowait(file_data)
+    downloaded = asyncio.Queue(maxsize=EXPORT_CONCURRENCY)
+    transfer_status = TransferStatus(message)
+
+    async def fetch():
+        while True:
+            try:
+                file_data = pending.get_nowait()
+            except asyncio.QueueEmpty:
+                return
+            try:
+                fh = await download_file_from_drive(file_data.file_id, transfer_status.callback(file_data.file_name))
+                await downloaded.put((file_data, fh, None))
+            except Exception as e:
+                await downloaded.put((file_data, None, e))
+            finally:
+                transfer_status.forget(file_data.file_name)
+
+    workers = [asyncio.create_task(fetch()) for _ in range(min(EXPORT_CONCURRENCY, len(selected)))]
+    writer = ZipVolumeWriter(f"submissions_{datetime.now():%Y%m%d_%H%M%S}")
+    failed = []
+    try:
+        for _ in range(len(selected)):
+            file_data, fh, error = await downloaded.get()
+            if error is None:
+                try:
+                    size = os.fstat(fh.fileno()).st_size
+                    await asyncio.to_thread(writer.add, file_data.file_name, fh, size)
+                except Exception as e:
+                    error = e
+                finally:
+                    fh.close()
+            if error is not None:
+                failed.append(f"{file_data.file_name}: {str(error)[:100]}")
+        volumes = writer.close()
+        await transfer_status.finish()
+    except BaseException:
+        # Cancelled or failed: close downloads that never reached the archive.
+        while not downloaded.empty():
+            _, fh, _ = downloaded.get_nowait()
+            if fh is not None:
+                fh.close()
+        raise
+    finally:
+        for worker in workers:
+            worker.cancel()
+
+    sent = 0
+    try:
+        for filename, volume in volumes:
+            await message.reply_document(
+                document=volume,
+                filename=filename,
+                read_timeout=120,
                 connect_timeout=30,
-                write_timeout=30,
+                write_timeout=120,
             )
-            success_count += 1
-            await asyncio.sleep(1)
-        except Exception as e:
-            error_msg = f"⚠️ Failed to display {file_data['file_name']}: {str(e)[:200]}"
-            await update.message.reply_text(error_msg)
+            sent += 1
+    finally:
+        for _, volume in volumes:
+            volume.close()
 
-    await update.message.reply_text(
-        f"📊 Results:\n• Successfully shown: {success_count}\n• Total submissions: {len(filtered)}"
+    summary = (
+        f"📊 Export results:\n• Archived: {len(selected) - len(failed)}\n"
+        f"• Archives sent: {sent}/{len(volumes)}\n• Total submissions: {len(selected)}"
     )
+    if failed:
+        summary += "\n⚠️ Failed:\n" + "\n".join(failed[:20])
+    await message.reply_text(summary)
 
 
-def main():
-    application = Application.builder().token(TOKEN).build()
+async def post_shutdown(application: Application):
+    global _snapshot_timer
+    if _snapshot_timer is not None:
+        # Don't lose submissions still waiting for a debounced save
+        _snapshot_timer.cancel()
+        _snapshot_timer = None
+        await save_snapshot()
 
-    # Add handlers
+
+async def post_init(application: Application):
+    # Polling starts right after this returns; Google catches up in the background.
+    application.create_task(refresh_submissions())
+    print(f"Ready to poll after {time.perf_counter() - _PROCESS_START:.2f}s (imports: {IMPORT_SECONDS:.2f}s)")
+
+
+def add_handlers(application: Application):
+    application.add_handler(TypeHandler(Update, record_first_update), group=-1)
     application.add_handler(CommandHandler("start", start))
     application.add_handler(CommandHandler("register_teacher", register_teacher))
     application.add_handler(CommandHandler("view_submissions", view_submissions))
+    application.add_handler(CommandHandler("cancel", cancel))
+    application.add_handler(CommandHandler("export_submissions", export_submissions))
+    application.add_handler(CommandHandler("search", search_submissions))
+    application.add_handler(CommandHandler("history", search_history))
+    application.add_handler(CommandHandler("digest_now", digest_now))
+    application.add_handler(CommandHandler("metrics", show_metrics))
     application.add_handler(MessageHandler(filters.Document.ALL, handle_document))
-    application.add_handler(CallbackQueryHandler(handle_teacher_selection, pattern="^teacher_"))
+    # Non-blocking, so uploads from different students run side by side and the
+    # admission controller's byte budget and round-robin queue decide who goes first.
+    application.add_handler(CallbackQueryHandler(handle_teacher_selection, pattern="^teacher_", block=False))
 
-    # Load initial submissions
-    global submissions
-    submissions = load_all_submissions()
+
+def main():
+    builder = Application.builder().token(TOKEN).post_init(post_init).post_shutdown(post_shutdown)
+    recorder = None
+    if RECORD_SESSION:
+        from loadtest import SessionRecorder
+
+        recorder = SessionRecorder(RECORD_SESSION)
+        builder = builder.request(recorder.request())
+    application = builder.build()
+
+    # Add handlers
+    add_handlers(application)
+
+    # Serve the last known state until the background refresh completes
+    load_snapshot()
+
+    # After the snapshot, so teachers it knows about get their digest watermarks now
+    digest_hour, digest_minute = map(int, DIGEST_TIME.split(":"))
+    digest_scheduler.schedule(
+        application, dt_time(digest_hour, digest_minute, tzinfo=ZoneInfo(DIGEST_TIMEZONE))
+    )
+
+    tracing.configure(TRACE_FILE, OTEL_EXPORTER_OTLP_ENDPOINT)
+
+    if recorder:
+        recorder.attach(application)
+        recorder.write_header(ADMIN_TELEGRAM_IDS, snapshot_state())
 
     # Start bot
     application.run_polling()
 
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
@@ -0,0 +1,68 @@
+"""Checkpoints for /view_submissions deliveries.
+
+A delivery records every submission it has sent to a chat. If it stops
+halfway (Telegram timeout, restart, /cancel), the next /view_submissions in
+that chat skips what was already delivered instead of starting over. The
+checkpoint is removed once a delivery completes.
+"""
+
+import json
+import os
+from datetime import datetime
+
+
+def delivery_key(submission):
+    # Drive ids survive renames; fall back to the name for records without one.
+    return submission.file_id or submission.file_name
+
+
+class DeliveryCheckpoint:
+    def __init__(self, directory, chat_id):
+        self.path = os.path.join(directory, f"{chat_id}.json")
+        self.chat_id = chat_id
+        self.delivered = set()
+        self.started_at = datetime.now().isoformat()
+
+    @classmethod
+    def load(cls, directory, chat_id):
+        checkpoint = cls(directory, chat_id)
+        try:
+            with open(checkpoint.path, encoding="utf-8") as f:
+                state = json.load(f)
+        except FileNotFoundError:
+            return checkpoint
+        except (OSError, ValueError) as e:
+            print(f"Delivery checkpoint load error: {e}")
+            return checkpoint
+        checkpoint.delivered = set(state.get("delivered", []))
+        checkpoint.started_at = state.get("started_at", checkpoint.started_at)
+        return checkpoint
+
+    def mark_delivered(self, submission):
+        self.delivered.add(delivery_key(submission))
+        self._save()
+
+    def is_delivered(self, submission):
+        return delivery_key(submission) in self.delivered
+
+    def _save(self):
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(
+                {
+                    "chat_id": self.chat_id,
+                    "started_at": self.started_at,
+                    "updated_at": datetime.now().isoformat(),
+                    "delivered": sorted(self.delivered),
+                },
+                f,
+            )
+        os.replace(tmp_path, self.path)
+
+    def clear(self):
+        self.delivered = set()
+        try:
+            os.remove(self.path)
+        except FileNotFoundError:
+            pass
@@ -0,0 +1,161 @@
+"""Scheduled digests of new submissions for teachers.
+
+Instead of teachers re-running /view_submissions and receiving every file
+again, a daily job on the PTB JobQueue sends each teacher only what arrived
+since their last digest, batched into media groups of up to 10 documents.
+
+Each teacher has a watermark: the newest submission time delivered so far,
+plus the names of files delivered at exactly that time (several can share a
+timestamp). The watermark advances after every batch, so a digest that fails
+halfway continues from the last delivered batch next time. A teacher's
+watermark starts when the scheduler first sees them, so the first digest
+holds only what arrived after that, not every earlier submission.
+"""
+
+import asyncio
+import json
+import os
+from datetime import datetime
+
+from telegram import InputMediaDocument
+from telegram.ext import Application, CallbackContext
+
+MEDIA_GROUP_SIZE = 10  # Telegram's limit for one media group
+
+
+class DigestScheduler:
+    def __init__(self, state_path, refresh_submissions, get_teachers, download):
+        """
+        ``refresh_submissions`` is an async callable returning the current
+        {file_name: Submission} mapping, ``get_teachers`` returns the
+        {teacher_id: Teacher} mapping and ``download`` is an async callable
+        turning a Drive file id into an open binary file.
+        """
+        self.state_path = state_path
+        self.refresh_submissions = refresh_submissions
+        self.get_teachers = get_teachers
+        self.download = download
+        self.watermarks = self._load()
+        self._lock = asyncio.Lock()
+
+    def _load(self):
+        try:
+            with open(self.state_path, encoding="utf-8") as f:
+                state = json.load(f)
+        except FileNotFoundError:
+            return {}
+        except (OSError, ValueError) as e:
+            print(f"Digest state load error: {e}")
+            return {}
+        return {
+            int(teacher_id): (datetime.fromisoformat(mark["time"]), set(mark["at_time"]))
+            for teacher_id, mark in state.items()
+        }
+
+    def _save(self):
+        state = {
+            str(teacher_id): {"time": mark_time.isoformat(), "at_time": sorted(at_time)}
+            for teacher_id, (mark_time, at_time) in self.watermarks.items()
+        }
+        os.makedirs(os.path.dirname(self.state_path) or ".", exist_ok=True)
+        tmp_path = self.state_path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(state, f)
+        os.replace(tmp_path, self.state_path)
+
+    def schedule(self, application: Application, at):
+        """Run the digest every day at ``at`` (a ``datetime.time``)."""
+        for teacher_id in self.get_teachers():
+            self.watch(teacher_id)
+        application.job_queue.run_daily(self.run_job, time=at, name="teacher_digest")
+
+    def watch(self, teacher_id):
+        """Start the watermark of a newly seen teacher at the current time."""
+        if teacher_id not in self.watermarks:
+            # Submission times have whole seconds; ones in this second still count as new.
+            self.watermarks[teacher_id] = (datetime.now().replace(microsecond=0), set())
+            self._save()
+
+    def pending_for(self, teacher_id, submissions):
+        """Submissions for ``teacher_id`` newer than its watermark, oldest first."""
+        self.watch(teacher_id)
+        mark_time, at_time = self.watermarks[teacher_id]
+        pending = [
+            s
+            for s in submissions.values()
+            if s.teacher_id == teacher_id
+            and s.file_id
+            and s.submission_time is not None
+            and (s.submission_time > mark_time or (s.submission_time == mark_time and s.file_name not in at_time))
+        ]
+        pending.sort(key=lambda s: (s.submission_time, s.file_name))
+        return pending
+
+    def _advance(self, teacher_id, batch):
+        mark_time, at_time = self.watermarks[teacher_id]
+        for submission in batch:
+            if submission.submission_time > mark_time:
+                mark_time, at_time = submission.submission_time, set()
+            at_time.add(submission.file_name)
+        self.watermarks[teacher_id] = (mark_time, at_time)
+        self._save()
+
+    async def run_job(self, context: CallbackContext):
+        await self.run(context.bot)
+
+    async def run(self, bot, teacher_ids=None):
+        """Deliver digests to ``teacher_ids`` (default: every teacher); returns {teacher_id: count}."""
+        async with self._lock:  # A manual /digest_now must not overlap the scheduled run
+            submissions = await self.refresh_submissions()
+            delivered = {}
+            for teacher_id in teacher_ids or list(self.get_teachers()):
+                try:
+                    delivered[teacher_id] = await self.deliver(bot, teacher_id, submissions)
+                except Exception as e:
+                    print(f"Digest for teacher {teacher_id} failed: {e}")
+            return delivered
+
+    async def deliver(self, bot, teacher_id, submissions):
+        pending = self.pending_for(teacher_id, submissions)
+        if not pending:
+            return 0
+
+        await bot.send_message(teacher_id, f"📬 {len(pending)} new submission(s) since your last digest.")
+        sent = 0
+        for i in range(0, len(pending), MEDIA_GROUP_SIZE):
+            batch = pending[i : i + MEDIA_GROUP_SIZE]
+            files = await asyncio.gather(*(self.download(s.file_id) for s in batch), return_exceptions=True)
+            try:
+                for fh in files:
+                    if isinstance(fh, BaseException):
+                        raise fh
+                captions = [
+                    f"📄 {s.file_name}\n👤 Student: {s.student_name}\n⏰ Submitted: {s.submission_time_text}"
+                    for s in batch
+                ]
+                if len(batch) == 1:
+                    # Media groups need at least two items.
+                    await bot.send_document(
+                        teacher_id,
+                        files[0],
+                        filename=batch[0].file_name,
+                        caption=captions[0],
+                        read_timeout=120,
+                        write_timeout=120,
+                        connect_timeout=30,
+                    )
+                else:
+                    media = [
+                        InputMediaDocument(fh, filename=s.file_name, caption=caption)
+                        for s, fh, caption in zip(batch, files, captions)
+                    ]
+                    await bot.send_media_group(
+                        teacher_id, media, read_timeout=120, write_timeout=120, connect_timeout=30
+                    )
+            finally:
+                for fh in files:
+                    if not isinstance(fh, BaseException):
+                        fh.close()
+            self._advance(teacher_id, batch)
+            sent += len(batch)
+        return sent
@@ -0,0 +1,99 @@
+"""Bounded thread pools for blocking Google API calls.
+
+``asyncio.to_thread`` shares the loop's default executor with everything else
+and never says no, so a handful of slow Drive downloads could occupy every
+worker thread in the process. Each API gets its own ``BoundedExecutor``
+instead, which
+
+* caps running calls at ``max_workers`` and waiting calls at ``max_queue``;
+  callers beyond that wait up to ``admission_timeout`` and then get
+  ``ExecutorBusy``, which handlers can report back to the user,
+* gives every call a timeout, and
+* propagates cancellation: calls still in the queue are dropped. A call that
+  is already running cannot be interrupted; it finishes in the background and
+  keeps its slot until then, and its result is discarded.
+"""
+
+import asyncio
+import contextvars
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+class ExecutorBusy(RuntimeError):
+    pass
+
+
+class BoundedExecutor:
+    def __init__(self, name, max_workers, max_queue, timeout, admission_timeout=10):
+        self.name = name
+        self.max_workers = max_workers
+        self.max_queue = max_queue
+        self.timeout = timeout
+        self.admission_timeout = admission_timeout
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix=f"{name}-io")
+        self._slots = asyncio.Semaphore(max_workers + max_queue)
+        self._lock = threading.Lock()
+        self.pending = 0  # Admitted calls that have not finished, queued or running
+        self.running = 0
+        self.completed = 0
+        self.timed_out = 0
+        self.rejected = 0
+
+    async def run(self, func, *args, timeout=None):
+        """Run ``func(*args)`` on this executor and return its result."""
+        try:
+            await asyncio.wait_for(self._slots.acquire(), self.admission_timeout)
+        except asyncio.TimeoutError:
+            self.rejected += 1
+            raise ExecutorBusy(f"{self.name} is overloaded, please try again later.") from None
+        self.pending += 1
+
+        loop = asyncio.get_running_loop()
+        context = contextvars.copy_context()
+
+        def call():
+            with self._lock:
+                self.running += 1
+            try:
+                return context.run(func, *args)
+            finally:
+                with self._lock:
+                    self.running -= 1
+
+        def release():
+            self.pending -= 1
+            self._slots.release()
+
+        future = self._pool.submit(call)
+        # The slot is only freed once the thread is really done, so calls that keep
+        # running after a timeout still count against the limit.
+        future.add_done_callback(lambda _: loop.call_soon_threadsafe(release))
+
+        timeout = self.timeout if timeout is None else timeout
+        wrapped = asyncio.wrap_future(future)
+        try:
+            # asyncio.wait instead of wait_for, so a TimeoutError raised by func
+            # itself is not mistaken for the call timing out.
+            done, _ = await asyncio.wait({wrapped}, timeout=timeout)
+        except asyncio.CancelledError:
+            wrapped.cancel()  # Drops the call if it has not started yet
+            raise
+        if not done:
+            self.timed_out += 1
+            wrapped.cancel()
+            raise TimeoutError(f"{self.name} call timed out after {timeout}s")
+        result = wrapped.result()
+        self.completed += 1
+        return result
+
+    def metrics(self):
+        return {
+            f"{self.name}_running": self.running,
+            f"{self.name}_queued": max(self.pending - self.running, 0),
+            f"{self.name}_completed": self.completed,
+            f"{self.name}_timed_out": self.timed_out,
+            f"{self.name}_rejected": self.rejected,
+        }
+
+    def shutdown(self):
+        self._pool.shutdown(wait=False, cancel_futures=True)
@@ -0,0 +1,66 @@
+"""Lazily initialised Google API clients.
+
+googleapiclient and google.oauth2 are slow to import, so nothing from them is
+loaded until the first Drive or Sheets call actually needs it.
+"""
+
+import threading
+
+SERVICE_ACCOUNT_FILE = "service-account.json"
+SCOPES = [
+    "https://www.googleapis.com/auth/drive",
+    "https://www.googleapis.com/auth/spreadsheets",
+]
+
+# Cache credentials to avoid reloading on every call.
+_GOOGLE_CREDENTIALS = None
+
+# httplib2 is not thread-safe, so worker threads each keep their own services.
+_thread_local = threading.local()
+
+
+def get_google_credentials():
+    global _GOOGLE_CREDENTIALS
+    if _GOOGLE_CREDENTIALS is None:
+        from google.oauth2.service_account import Credentials
+
+        _GOOGLE_CREDENTIALS = Credentials.from_service_account_file(SERVICE_ACCOUNT_FILE, scopes=SCOPES)
+    return _GOOGLE_CREDENTIALS
+
+
+def build_drive_service():
+    from googleapiclient.discovery import build
+
+    return build("drive", "v3", credentials=get_google_credentials())
+
+
+def build_sheets_service():
+    from googleapiclient.discovery import build
+
+    return build("sheets", "v4", credentials=get_google_credentials())
+
+
+def thread_drive_service():
+    """Drive service owned by the calling thread, built on first use."""
+    if not hasattr(_thread_local, "drive_service"):
+        _thread_local.drive_service = build_drive_service()
+    return _thread_local.drive_service
+
+
+def thread_sheets_service():
+    """Sheets service owned by the calling thread, built on first use."""
+    if not hasattr(_thread_local, "sheets_service"):
+        _thread_local.sheets_service = build_sheets_service()
+    return _thread_local.sheets_service
+
+
+def thread_authorized_http():
+    """Authorized httplib2 client owned by the calling thread, for raw Drive requests."""
+    if not hasattr(_thread_local, "authorized_http"):
+        import google_auth_httplib2
+        import httplib2
+
+        _thread_local.authorized_http = google_auth_httplib2.AuthorizedHttp(
+            get_google_credentials(), http=httplib2.Http(timeout=60)
+        )
+    return _thread_local.authorized_http
@@ -0,0 +1,469 @@
+"""Record production sessions and replay them against fake Telegram and Google backends.
+
+Recording: start the bot with RECORD_SESSION=session.jsonl. Every incoming
+update and every outgoing Bot API call (with its duration) is appended to the
+file, together with the teachers/submissions state at startup.
+
+Replaying:
+    python loadtest.py session.jsonl [--speed 10] [--telegram-latency 0.05] [--google-latency 0.2]
+
+The replayer imports bot.py with a scratch STATE_DIR, swaps the Bot API for an
+in-process fake and the Google clients for in-memory Drive/Sheets fakes, starts
+the Application and puts the recorded updates on its update queue on the
+recorded schedule, compressed by ``--speed``. Updates are processed the way
+polling processes them, including queueing behind slow handlers and
+background tasks. It reports throughput, latency percentiles (from enqueue to
+handled) and every update whose outgoing calls differ from the recording.
+"""
+
+import argparse
+import asyncio
+import contextvars
+import json
+import os
+import re
+import sys
+import tempfile
+import threading
+import time
+from collections import defaultdict
+from datetime import datetime
+
+from telegram import Update
+from telegram.ext import TypeHandler
+from telegram.request import BaseRequest, HTTPXRequest
+
+# Methods that are plumbing rather than bot output; they are not compared.
+IGNORED_METHODS = {"getMe", "getUpdates", "deleteWebhook", "setWebhook", "close", "logOut"}
+
+# The update currently being handled, so outgoing calls can be attributed to it.
+_current_update_id = contextvars.ContextVar("current_update_id", default=None)
+
+
+def _method_name(url):
+    return url.rstrip("/").rsplit("/", 1)[-1]
+
+
+class SessionRecorder:
+    def __init__(self, path):
+        self.path = path
+        self._file = open(path, "a", encoding="utf-8")
+        self._started = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _write(self, record):
+        record["t"] = round(time.monotonic() - self._started, 6)
+        with self._lock:
+            self._file.write(json.dumps(record, ensure_ascii=False, default=str) + "\n")
+            self._file.flush()
+
+    def write_header(self, admin_ids, state):
+        self._write({"type": "session", "started": datetime.now().isoformat(), "admin_ids": admin_ids, "state": state})
+
+    def request(self, **kwargs):
+        """An HTTPXRequest that logs every call it makes."""
+        return RecordingRequest(self, **kwargs)
+
+    def attach(self, application):
+        application.add_handler(TypeHandler(Update, self._record_update), group=-2)
+
+    async def _record_update(self, update: Update, context):
+        _current_update_id.set(update.update_id)
+        self._write({"type": "update", "update": update.to_dict()})
+
+    def record_call(self, method, params, duration, status):
+        if method in ("getUpdates",):
+            return
+        self._write(
+            {
+                "type": "call",
+                "update_id": _current_update_id.get(),
+                "method": method,
+                "params": params,
+                "duration": round(duration, 6),
+                "status": status,
+            }
+        )
+
+
+class RecordingRequest(HTTPXRequest):
+    def __init__(self, recorder, **kwargs):
+        super().__init__(**kwargs)
+        self._recorder = recorder
+
+    async def do_request(self, url, method, request_data=None, *args, **kwargs):
+        started = time.perf_counter()
+        status = None
+        try:
+            status, payload = await super().do_request(url, method, request_data, *args, **kwargs)
+            return status, payload
+        finally:
+            if "/file/bot" not in url:  # File downloads have no interesting parameters
+                params = request_data.parameters if request_data else {}
+                self._recorder.record_call(_method_name(url), params, time.perf_counter() - started, status)
+
+
+class FakeTelegramRequest(BaseRequest):
+    """In-process stand-in for the Bot API that answers every call successfully."""
+
+    def __init__(self, latency=0.0):
+        self.latency = latency
+        self.calls = []  # (update_id, method, params)
+        self.file_sizes = {}  # file_id -> size, learned from the replayed updates
+        self._message_id = 0
+
+    async def initialize(self):
+        pass
+
+    async def shutdown(self):
+        pass
+
+    @property
+    def read_timeout(self):
+        return None
+
+    def _message(self, params, **extra):
+        self._message_id += 1
+        return {
+            "message_id": self._message_id,
+            "date": int(time.time()),
+            "chat": {"id": int(params.get("chat_id", 0) or 0), "type": "private"},
+            **extra,
+        }
+
+    async def do_request(self, url, method, request_data=None, *args, **kwargs):
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        if "/file/bot" in url:
+            file_id = url.rsplit("/", 1)[-1]
+            return 200, b"\0" * self.file_sizes.get(file_id, 1024)
+
+        name = _method_name(url)
+        params = request_data.parameters if request_data else {}
+        if name not in IGNORED_METHODS:
+            self.calls.append((_current_update_id.get(), name, params))
+
+        if name == "getMe":
+            result = {"id": 1, "is_bot": True, "first_name": "Replay", "username": "replay_bot"}
+        elif name in ("sendMessage", "editMessageText"):
+            result = self._message(params, text=params.get("text", ""))
+        elif name == "sendDocument":
+            result = self._message(
+                params,
+                caption=params.get("caption", ""),
+                document={"file_id": f"doc{self._message_id}", "file_unique_id": f"u{self._message_id}"},
+            )
+        elif name == "sendMediaGroup":
+            result = [self._message(params) for _ in params.get("media", [])]
+        elif name == "getFile":
+            file_id = params["file_id"]
+            result = {
+                "file_id": file_id,
+                "file_unique_id": file_id,
+                "file_size": self.file_sizes.get(file_id, 1024),
+                "file_path": f"https://api.telegram.org/file/botTOKEN/{file_id}",
+            }
+        elif name == "getUpdates":
+            result = []
+        else:
+            result = True
+        return 200, json.dumps({"ok": True, "result": result}).encode()
+
+
+class _Call:
+    """A googleapiclient-style request object: ``.execute()`` returns the result."""
+
+    def __init__(self, latency, func):
+        self._latency = latency
+        self._func = func
+
+    def execute(self):
+        if self._latency:
+            time.sleep(self._latency)
+        return self._func()
+
+
+class FakeGoogle:
+    """In-memory Drive folder and submissions sheet with configurable latency."""
+
+    def __init__(self, latency=0.0):
+        self.latency = latency
+        self.files = {}  # id -> {"name", "size", "mimeType"}
+        self.rows = []
+        self._lock = threading.Lock()
+
+    def seed(self, submissions):
+        for submission in submissions:
+            file_id = submission.get("file_id") or f"seed-{len(self.files)}"
+            self.files[file_id] = {"name": submission["file_name"], "size": 1024, "mimeType": "application/pdf"}
+            self.rows.append(
+                [
+                    submission["student_name"],
+                    submission["file_name"],
+                    submission["submission_time"] or "",
+                    f"https://drive.example/{file_id}",
+                    str(submission["teacher_id"] or ""),
+                ]
+            )
+
+    # Drive
+    def create(self, body, media_body=None, **kwargs):
+        def run():
+            with self._lock:
+                file_id = f"fake-{len(self.files)}"
+                size = media_body.size() if media_body is not None else 0
+                self.files[file_id] = {"name": body["name"], "size": size, "mimeType": "application/octet-stream"}
+            return {"id": file_id, "webViewLink": f"https://drive.example/{file_id}"}
+
+        return _Call(self.latency, run)
+
+    def list(self, **kwargs):
+        return _Call(
+            self.latency,
+            lambda: {
+                "files": [
+                    {"id": file_id, "name": f["name"], "webViewLink": f"https://drive.example/{file_id}", "mimeType": f["mimeType"]}
+                    for file_id, f in list(self.files.items())
+                ]
+            },
+        )
+
+    def get(self, fileId, **kwargs):
+        return _Call(self.latency, lambda: {"size": str(self.files.get(fileId, {}).get("size", 0))})
+
+    def create_permission(self, **kwargs):
+        return _Call(self.latency, dict)
+
+    # Sheets
+    def append(self, body, **kwargs):
+        def run():
+            with self._lock:
+                self.rows.extend(body["values"])
+            return {}
+
+        return _Call(self.latency, run)
+
+    def get_values(self, **kwargs):
+        return _Call(self.latency, lambda: {"values": [list(map(str, row)) for row in self.rows]})
+
+    # Raw media requests used by range_download
+    def request(self, url, headers=None):
+        if self.latency:
+            time.sleep(self.latency)
+        start, end = map(int, headers["Range"][len("bytes=") :].split("-"))
+        return _Response(206), b"\0" * (end - start + 1)
+
+
+class _Response:
+    def __init__(self, status):
+        self.status = status
+
+
+class _DriveView:
+    """Routes ``files()``/``permissions()`` calls to FakeGoogle."""
+
+    def __init__(self, fake):
+        self._fake = fake
+
+    def files(self):
+        return self._fake
+
+    def permissions(self):
+        return _PermissionsView(self._fake)
+
+
+class _PermissionsView:
+    def __init__(self, fake):
+        self._fake = fake
+
+    def create(self, **kwargs):
+        return self._fake.create_permission(**kwargs)
+
+
+class _SheetsView:
+    def __init__(self, fake):
+        self._fake = fake
+
+    def spreadsheets(self):
+        return self
+
+    def values(self):
+        return self
+
+    def get(self, **kwargs):
+        return self._fake.get_values(**kwargs)
+
+    def append(self, **kwargs):
+        return self._fake.append(**kwargs)
+
+
+def install_fake_google(fake, modules):
+    """Point the Google client helpers of ``modules`` at ``fake``."""
+    drive, sheets = _DriveView(fake), _SheetsView(fake)
+    replacements = {
+        "build_drive_service": lambda: drive,
+        "thread_drive_service": lambda: drive,
+        "build_sheets_service": lambda: sheets,
+        "thread_sheets_service": lambda: sheets,
+        "thread_authorized_http": lambda: fake,
+    }
+    for module in modules:
+        for name, replacement in replacements.items():
+            if hasattr(module, name):
+                setattr(module, name, replacement)
+
+
+def load_session(path):
+    header, updates, calls = None, [], defaultdict(list)
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            record = json.loads(line)
+            if record["type"] == "session":
+                header = record
+            elif record["type"] == "update":
+                updates.append(record)
+            elif record["type"] == "call" and record["method"] not in IGNORED_METHODS:
+                calls[record["update_id"]].append((record["method"], record["params"]))
+    return header or {"admin_ids": [], "state": None}, updates, calls
+
+
+def _normalize(method, params):
+    """Comparable form of a call: ignore numbers (times, ids, counters) in its text."""
+    text = str(params.get("text") or params.get("caption") or "")
+    return method, re.sub(r"\d+", "#", text)
+
+
+def _percentile(values, fraction):
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+
+async def replay(path, speed=1.0, telegram_latency=0.0, google_latency=0.0):
+    header, updates, recorded_calls = load_session(path)
+
+    # bot.py reads its configuration at import time.
+    state_dir = tempfile.mkdtemp(prefix="replay-")
+    os.environ.update(
+        {
+            "BOT_TOKEN": os.environ.get("BOT_TOKEN", "123456:replay"),
+            "GOOGLE_DRIVE_FOLDER_ID": "replay-folder",
+            "GOOGLE_SHEET_ID": "replay-sheet",
+            "ADMIN_TELEGRAM_IDS": ",".join(map(str, header["admin_ids"])) or "0",
+            "STATE_DIR": state_dir,
+        }
+    )
+    if header["state"]:
+        with open(os.path.join(state_dir, "snapshot.json"), "w", encoding="utf-8") as f:
+            json.dump(header["state"], f)
+
+    import bot
+    import range_download
+
+    fake_google = FakeGoogle(google_latency)
+    fake_google.seed((header["state"] or {}).get("submissions", []))
+    install_fake_google(fake_google, [bot, range_download])
+
+    fake_telegram = FakeTelegramRequest(telegram_latency)
+    application = (
+        bot.Application.builder()
+        .token(os.environ["BOT_TOKEN"])
+        .request(fake_telegram)
+        .get_updates_request(FakeTelegramRequest())
+        .build()
+    )
+
+    latencies = []
+    enqueued = {}  # update_id -> time it was put on the update queue
+
+    async def handled(update: Update, context):
+        latencies.append(time.perf_counter() - enqueued.pop(update.update_id))
+
+    async def report_error(update, context):
+        print(f"Update {getattr(update, 'update_id', None)} raised {context.error!r}")
+
+    application.add_handler(TypeHandler(Update, _track_update), group=-2)
+    bot.add_handlers(application)
+    application.add_handler(TypeHandler(Update, handled), group=1000)  # After every bot handler
+    application.add_error_handler(report_error)
+    bot.load_snapshot()
+    await application.initialize()
+    await application.start()
+
+    started = time.perf_counter()
+    first_t = updates[0]["t"] if updates else 0
+    for record in updates:
+        delay = (record["t"] - first_t) / speed - (time.perf_counter() - started)
+        if delay > 0:
+            await asyncio.sleep(delay)
+        update = Update.de_json(record["update"], application.bot)
+        document = update.message.document if update.message else None
+        if document:
+            fake_telegram.file_sizes[document.file_id] = document.file_size or 1024
+        enqueued[update.update_id] = time.perf_counter()
+        await application.update_queue.put(update)
+    # Handle everything queued, then wait for background tasks such as deliveries.
+    await application.update_queue.join()
+    await application.stop()
+    elapsed = time.perf_counter() - started
+    await application.shutdown()
+    await bot.post_shutdown(application)
+
+    replayed_calls = defaultdict(list)
+    for update_id, method, params in fake_telegram.calls:
+        replayed_calls[update_id].append((method, params))
+    divergences = []
+    for record in updates:
+        update_id = record["update"]["update_id"]
+        expected = [_normalize(*call) for call in recorded_calls.get(update_id, [])]
+        actual = [_normalize(*call) for call in replayed_calls.get(update_id, [])]
+        if expected != actual:
+            divergences.append((update_id, expected, actual))
+
+    report = {
+        "updates": len(updates),
+        "seconds": elapsed,
+        "throughput": len(updates) / elapsed if elapsed else 0.0,
+        "latency_p50": _percentile(latencies, 0.50),
+        "latency_p90": _percentile(latencies, 0.90),
+        "latency_p99": _percentile(latencies, 0.99),
+        "latency_max": max(latencies, default=0.0),
+        "api_calls": len(fake_telegram.calls),
+        "divergences": divergences,
+    }
+    return report
+
+
+async def _track_update(update: Update, context):
+    _current_update_id.set(update.update_id)
+
+
+def print_report(report):
+    print(f"Replayed {report['updates']} updates in {report['seconds']:.2f}s ({report['throughput']:.1f} updates/s)")
+    print(
+        "Latency (queued to handled): "
+        f"p50 {report['latency_p50'] * 1000:.1f} ms, p90 {report['latency_p90'] * 1000:.1f} ms, "
+        f"p99 {report['latency_p99'] * 1000:.1f} ms, max {report['latency_max'] * 1000:.1f} ms"
+    )
+    print(f"Bot API calls: {report['api_calls']}")
+    print(f"Divergent updates: {len(report['divergences'])}")
+    for update_id, expected, actual in report["divergences"][:20]:
+        print(f"  update {update_id}:\n    recorded: {expected}\n    replayed: {actual}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Replay a recorded bot session against fake backends.")
+    parser.add_argument("session", help="JSON-lines file written with RECORD_SESSION")
+    parser.add_argument("--speed", type=float, default=1.0, help="time compression factor, e.g. 10")
+    parser.add_argument("--telegram-latency", type=float, default=0.0, help="seconds added to each Bot API call")
+    parser.add_argument("--google-latency", type=float, default=0.0, help="seconds added to each Google call")
+    args = parser.parse_args()
+
+    report = asyncio.run(replay(args.session, args.speed, args.telegram_latency, args.google_latency))
+    print_report(report)
+    sys.exit(1 if report["divergences"] else 0)
+
+
+if __name__ == "__main__":
+    main()
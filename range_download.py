@@ -0,0 +1,216 @@
+"""Parallel HTTP Range downloads of Drive files.
+
+``MediaIoBaseDownload`` fetches one chunk after another into memory, which is
+slow and memory hungry for recorded presentations of several hundred MB. This
+engine preallocates the target file, maps it into memory and lets several
+workers fetch byte ranges into it concurrently:
+
+* chunk sizes adapt to the measured throughput, aiming for about
+  ``TARGET_CHUNK_SECONDS`` per request,
+* completed ranges are recorded in a ``.json`` sidecar next to the ``.part``
+  file, so an interrupted download resumes where it stopped, as long as the
+  file's size, md5 and modification time are unchanged,
+* every range request runs on the given ``BoundedExecutor`` (the bot gives
+  downloads a pool of their own), so all downloads together respect its
+  concurrency limit, timeouts and cancellation. A full pool is waited out
+  rather than treated as a failure.
+"""
+
+import asyncio
+import json
+import mmap
+import os
+import time
+
+from executors import ExecutorBusy
+from google_clients import thread_authorized_http, thread_drive_service
+
+MIN_CHUNK = 256 * 1024
+MAX_CHUNK = 32 * 1024 * 1024
+INITIAL_CHUNK = 1024 * 1024
+TARGET_CHUNK_SECONDS = 2.0
+MAX_RETRIES = 3
+MAX_BUSY_WAITS = 30  # Each wait lasts the executor's admission timeout
+
+DRIVE_MEDIA_URL = "https://www.googleapis.com/drive/v3/files/{file_id}?alt=media&supportsAllDrives=true"
+
+
+def _merge_ranges(ranges):
+    merged = []
+    for start, end in sorted(ranges):
+        if merged and start <= merged[-1][1]:
+            merged[-1][1] = max(merged[-1][1], end)
+        else:
+            merged.append([start, end])
+    return merged
+
+
+def _gaps(done, size):
+    """Byte ranges of ``[0, size)`` not covered by the merged ``done`` ranges."""
+    position = 0
+    for start, end in done:
+        if start > position:
+            yield position, start
+        position = max(position, end)
+    if position < size:
+        yield position, size
+
+
+def _fetch_range(file_id, start, end):
+    """Fetch and return the bytes ``[start, end)``; runs on an executor thread.
+
+    The caller copies them into the memory map on the event loop, so a thread
+    still running after a timeout or cancellation never touches a closed map.
+    """
+    headers = {"Range": f"bytes={start}-{end - 1}"}
+    response, content = thread_authorized_http().request(DRIVE_MEDIA_URL.format(file_id=file_id), headers=headers)
+    if response.status not in (200, 206) or len(content) != end - start:
+        raise IOError(f"Range {start}-{end} failed: HTTP {response.status}, {len(content)} bytes")
+    return content
+
+
+class RangeDownload:
+    def __init__(self, executor, file_id, path, workers=4, progress=None):
+        self.executor = executor
+        self.file_id = file_id
+        self.path = path
+        self.part_path = path + ".part"
+        self.state_path = path + ".part.json"
+        self.workers = workers
+        self.progress = progress  # Called as progress(done_bytes, total_bytes, bytes_per_second)
+        self.size = None
+        self.version = None  # (md5Checksum, modifiedTime) the partial data belongs to
+        self.done = []
+        self.chunk_size = INITIAL_CHUNK
+        self.retries = 0
+
+    def _load_state(self):
+        try:
+            with open(self.state_path, encoding="utf-8") as f:
+                state = json.load(f)
+        except (OSError, ValueError):
+            return []
+        if (
+            state.get("file_id") != self.file_id
+            or state.get("size") != self.size
+            or state.get("version") != list(self.version)
+            or not os.path.exists(self.part_path)
+        ):
+            return []
+        return _merge_ranges(state["done"])
+
+    def _save_state(self):
+        tmp_path = self.state_path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({"file_id": self.file_id, "size": self.size, "version": list(self.version), "done": self.done}, f)
+        os.replace(tmp_path, self.state_path)
+
+    def _adapt_chunk_size(self, nbytes, elapsed):
+        if elapsed <= 0:
+            return
+        wanted = nbytes / elapsed * TARGET_CHUNK_SECONDS
+        # Move halfway towards the target to smooth out noisy measurements.
+        self.chunk_size = int(min(MAX_CHUNK, max(MIN_CHUNK, (self.chunk_size + wanted) / 2)))
+
+    def _next_range(self, in_progress):
+        for start, end in _gaps(_merge_ranges(self.done + in_progress), self.size):
+            return start, min(end, start + self.chunk_size)
+        return None
+
+    async def run(self):
+        """Download the file to ``self.path`` and return the path.
+
+        Only one download per ``path`` may run at a time; callers deduplicate.
+        """
+        metadata = await self._run(
+            lambda: thread_drive_service().files().get(
+                fileId=self.file_id, fields="size, md5Checksum, modifiedTime", supportsAllDrives=True
+            ).execute()
+        )
+        if "size" not in metadata:
+            # Google Docs, Sheets and Slides have no binary content to download.
+            raise IOError(f"Drive file {self.file_id} has no downloadable content")
+        self.size = int(metadata["size"])
+        self.version = (metadata.get("md5Checksum"), metadata.get("modifiedTime"))
+
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        self.done = self._load_state()
+        resumed_bytes = sum(end - start for start, end in self.done)
+        if not self.done:
+            with open(self.part_path, "wb") as f:
+                f.truncate(self.size)  # Preallocate; sparse on most filesystems
+
+        started = time.perf_counter()
+        if self.size:
+            with open(self.part_path, "r+b") as f, mmap.mmap(f.fileno(), self.size) as mapped:
+                in_progress = []
+
+                async def worker():
+                    while True:
+                        next_range = self._next_range(in_progress)
+                        if next_range is None:
+                            return
+                        in_progress.append(list(next_range))
+                        try:
+                            await self._fetch_with_retries(next_range, mapped)
+                        finally:
+                            in_progress.remove(list(next_range))
+                        self.done = _merge_ranges(self.done + [list(next_range)])
+                        self._save_state()
+                        if self.progress:
+                            done_bytes = sum(end - start for start, end in self.done)
+                            elapsed = time.perf_counter() - started
+                            self.progress(done_bytes, self.size, (done_bytes - resumed_bytes) / max(elapsed, 1e-6))
+
+                tasks = [asyncio.create_task(worker()) for _ in range(self.workers)]
+                try:
+                    await asyncio.gather(*tasks)
+                except BaseException:
+                    for task in tasks:
+                        task.cancel()
+                    await asyncio.gather(*tasks, return_exceptions=True)
+                    raise
+                mapped.flush()
+
+        os.replace(self.part_path, self.path)
+        if os.path.exists(self.state_path):
+            os.remove(self.state_path)
+
+        elapsed = time.perf_counter() - started
+        transferred = self.size - resumed_bytes
+        if transferred > MAX_CHUNK:
+            print(
+                f"Downloaded {self.file_id}: {transferred / 1024 / 1024:.1f} MiB in {elapsed:.1f}s "
+                f"({transferred / 1024 / 1024 / max(elapsed, 1e-6):.1f} MiB/s, "
+                f"{resumed_bytes / 1024 / 1024:.1f} MiB resumed, {self.retries} retries)"
+            )
+        return self.path
+
+    async def _run(self, func, *args):
+        """Run on the executor, waiting while other downloads keep it full."""
+        for busy_waits in range(MAX_BUSY_WAITS + 1):
+            try:
+                return await self.executor.run(func, *args)
+            except ExecutorBusy:
+                if busy_waits == MAX_BUSY_WAITS:
+                    raise
+
+    async def _fetch_with_retries(self, byte_range, mapped):
+        start, end = byte_range
+        for attempt in range(MAX_RETRIES):
+            chunk_started = time.perf_counter()
+            try:
+                content = await self._run(_fetch_range, self.file_id, start, end)
+            except ExecutorBusy:
+                raise
+            except Exception as e:  # TimeoutError from the executor, socket and httplib2 errors
+                if attempt == MAX_RETRIES - 1:
+                    raise
+                self.retries += 1
+                self.chunk_size = max(MIN_CHUNK, self.chunk_size // 2)
+                print(f"Range {start}-{end} of {self.file_id} failed ({e}), retrying")
+                await asyncio.sleep(2**attempt)
+            else:
+                mapped[start:end] = content
+                self._adapt_chunk_size(end - start, time.perf_counter() - chunk_started)
+                return
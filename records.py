@@ -0,0 +1,123 @@
+"""Compact record types for teachers and submissions.
+
+A plain dict per submission costs several hundred bytes before counting its
+values, and the same student and teacher names were allocated again on every
+reload. These classes use ``__slots__`` (no per-instance ``__dict__``), intern
+the strings that repeat across records and keep timestamps as ``datetime``.
+"""
+
+import sys
+from datetime import datetime
+
+TIME_FORMAT = "%Y-%m-%d %H:%M:%S"
+# Rows are appended USER_ENTERED, so Sheets may store the time as a date and
+# return it formatted for the spreadsheet's locale, or it may have been edited
+# by hand. Month-first is tried before day-first, like Sheets' default locale.
+SHEET_TIME_FORMATS = (
+    TIME_FORMAT,
+    "%Y-%m-%d %H:%M",
+    "%Y-%m-%dT%H:%M:%S",
+    "%m/%d/%Y %H:%M:%S",
+    "%m/%d/%Y %H:%M",
+    "%d/%m/%Y %H:%M:%S",
+    "%d/%m/%Y %H:%M",
+    "%d.%m.%Y %H:%M:%S",
+    "%d.%m.%Y %H:%M",
+)
+
+
+def parse_time(value):
+    """Parse a sheet timestamp, returning None for missing or unrecognized values."""
+    if isinstance(value, datetime):
+        return value
+    if not isinstance(value, str):
+        return None
+    value = value.strip()
+    for time_format in SHEET_TIME_FORMATS:
+        try:
+            return datetime.strptime(value, time_format)
+        except ValueError:
+            continue
+    return None
+
+
+def _intern(value):
+    return sys.intern(value) if isinstance(value, str) else value
+
+
+class Teacher:
+    __slots__ = ("name", "registered_at")
+
+    def __init__(self, name, registered_at):
+        self.name = _intern(name)
+        self.registered_at = registered_at
+
+    def to_dict(self):
+        return {"name": self.name, "registered_at": self.registered_at.isoformat()}
+
+    @classmethod
+    def from_dict(cls, data):
+        return cls(data["name"], datetime.fromisoformat(data["registered_at"]))
+
+    def __repr__(self):
+        return f"Teacher(name={self.name!r}, registered_at={self.registered_at!r})"
+
+
+class Submission:
+    __slots__ = (
+        "student_name",
+        "file_name",
+        "submission_time",
+        "file_url",
+        "file_id",
+        "mime_type",
+        "teacher_id",
+        "time_text",  # The sheet's text when it is not a recognized timestamp, else None
+    )
+
+    def __init__(
+        self,
+        student_name,
+        file_name,
+        submission_time,
+        file_url,
+        teacher_id=None,
+        file_id=None,
+        mime_type=None,
+    ):
+        self.student_name = _intern(student_name)
+        self.file_name = file_name
+        self.submission_time = parse_time(submission_time)
+        self.time_text = submission_time if self.submission_time is None and submission_time else None
+        self.file_url = file_url
+        self.file_id = file_id
+        self.mime_type = _intern(mime_type)
+        self.teacher_id = teacher_id
+
+    @property
+    def raw_submission_time(self):
+        """The time as given: a ``datetime``, the unrecognized sheet text, or None."""
+        return self.submission_time or self.time_text
+
+    @property
+    def submission_time_text(self):
+        if self.submission_time is None:
+            return self.time_text or "Unknown Time"
+        return self.submission_time.strftime(TIME_FORMAT)
+
+    def to_dict(self):
+        data = {slot: getattr(self, slot) for slot in self.__slots__ if slot != "time_text"}
+        data["submission_time"] = self.submission_time.strftime(TIME_FORMAT) if self.submission_time else self.time_text
+        return data
+
+    @classmethod
+    def from_dict(cls, data):
+        return cls(**{slot: data.get(slot) for slot in cls.__slots__ if slot != "time_text"})
+
+    def __eq__(self, other):
+        if not isinstance(other, Submission):
+            return NotImplemented
+        return all(getattr(self, slot) == getattr(other, slot) for slot in self.__slots__)
+
+    def __repr__(self):
+        return f"Submission(file_name={self.file_name!r}, student_name={self.student_name!r}, teacher_id={self.teacher_id!r})"
@@ -0,0 +1,162 @@
+"""In-memory search index over submissions.
+
+Words from student names, file names and teacher names map to the set of
+submission keys (file names) containing them. Submission times are kept in a
+sorted list so date ranges are answered with two binary searches. Teacher
+names are indexed per teacher rather than per submission, so renaming a
+teacher does not require touching every submission.
+
+Queries are whitespace separated and every part must match:
+    abebe essay              words, matched against the indexed tokens
+    2024-03-01               submitted on that day
+    from:2024-03-01 to:2024-03-31
+    week 3                   third week after TERM_START_DATE, if configured
+"""
+
+import heapq
+import re
+from bisect import bisect_left, bisect_right, insort
+from datetime import datetime, timedelta
+
+# Letters and digits form separate tokens, so "week3_abebe.pdf" matches "week 3".
+_TOKEN_RE = re.compile(r"[^\W\d_]+|\d+")
+
+
+def tokenize(text):
+    return {token.lower() for token in _TOKEN_RE.findall(text or "")}
+
+
+class SubmissionIndex:
+    def __init__(self, term_start=None):
+        self.term_start = term_start
+        self._postings = {}  # token -> set of submission keys
+        self._teacher_postings = {}  # token -> set of teacher ids
+        self._teacher_tokens = {}  # teacher id -> tokens of their name
+        self._by_teacher = {}  # teacher id -> set of submission keys
+        self._by_time = []  # sorted (submission_time, key)
+        self._records = {}  # key -> indexed Submission
+
+    def __len__(self):
+        return len(self._records)
+
+    def add(self, submission):
+        self._add(submission, insort)
+
+    def _add(self, submission, insert_time):
+        key = submission.file_name
+        if key in self._records:
+            if self._records[key] == submission:
+                return
+            self.remove(key)
+        self._records[key] = submission
+        for token in tokenize(submission.student_name) | tokenize(submission.file_name):
+            self._postings.setdefault(token, set()).add(key)
+        self._by_teacher.setdefault(submission.teacher_id, set()).add(key)
+        if submission.submission_time is not None:
+            insert_time(self._by_time, (submission.submission_time, key))
+
+    def remove(self, key):
+        submission = self._records.pop(key, None)
+        if submission is None:
+            return
+        for token in tokenize(submission.student_name) | tokenize(submission.file_name):
+            keys = self._postings[token]
+            keys.discard(key)
+            if not keys:
+                del self._postings[token]
+        self._by_teacher[submission.teacher_id].discard(key)
+        if submission.submission_time is not None:
+            entry = (submission.submission_time, key)
+            position = bisect_left(self._by_time, entry)
+            if position < len(self._by_time) and self._by_time[position] == entry:
+                del self._by_time[position]
+
+    def sync(self, submissions):
+        """Bring the index in line with ``submissions``, touching only changed records."""
+        for key in self._records.keys() - submissions.keys():
+            self.remove(key)
+        # Append new times unsorted and sort once; insort per record is quadratic on a bulk load.
+        appended = []
+        for submission in submissions.values():
+            self._add(submission, lambda _, entry: appended.append(entry))
+        if appended:
+            self._by_time.extend(appended)
+            self._by_time.sort()
+
+    def set_teacher(self, teacher_id, name):
+        for token in self._teacher_tokens.pop(teacher_id, ()):
+            self._teacher_postings[token].discard(teacher_id)
+        tokens = tokenize(name)
+        self._teacher_tokens[teacher_id] = tokens
+        for token in tokens:
+            self._teacher_postings.setdefault(token, set()).add(teacher_id)
+
+    def _token_matches(self, token):
+        keys = self._postings.get(token, set())
+        teacher_ids = self._teacher_postings.get(token)
+        if teacher_ids:
+            keys = keys.union(*(self._by_teacher.get(teacher_id, ()) for teacher_id in teacher_ids))
+        return keys
+
+    def _time_range(self, start, end):
+        lo = bisect_left(self._by_time, (start,)) if start else 0
+        hi = bisect_right(self._by_time, (end, "\U0010ffff")) if end else len(self._by_time)
+        return {key for _, key in self._by_time[lo:hi]}
+
+    def parse_query(self, query):
+        """Split a query into word tokens and a (start, end) time range."""
+        words = []
+        start = end = None
+        parts = query.split()
+        i = 0
+        while i < len(parts):
+            part = parts[i]
+            key, _, value = part.partition(":")
+            if key == "from" and value:
+                start = datetime.strptime(value, "%Y-%m-%d")
+            elif key == "to" and value:
+                end = datetime.strptime(value, "%Y-%m-%d") + timedelta(days=1) - timedelta(microseconds=1)
+            elif re.fullmatch(r"\d{4}-\d{2}-\d{2}", part):
+                start = datetime.strptime(part, "%Y-%m-%d")
+                end = start + timedelta(days=1) - timedelta(microseconds=1)
+            elif (
+                self.term_start
+                and part.lower() == "week"
+                and i + 1 < len(parts)
+                and parts[i + 1].isdigit()
+                and int(parts[i + 1]) > 0
+            ):
+                start = self.term_start + timedelta(weeks=int(parts[i + 1]) - 1)
+                end = start + timedelta(weeks=1) - timedelta(microseconds=1)
+                i += 1
+            else:
+                words.extend(tokenize(part))
+            i += 1
+        return words, start, end
+
+    def search(self, query, teacher_id=None, limit=20):
+        """Return matching submissions, newest first.
+
+        ``teacher_id`` restricts results to one teacher's submissions.
+        """
+        words, start, end = self.parse_query(query)
+        candidates = []
+        if teacher_id is not None:
+            candidates.append(self._by_teacher.get(teacher_id, set()))
+        if start or end:
+            candidates.append(self._time_range(start, end))
+        candidates.extend(self._token_matches(word) for word in words)
+        if not candidates:
+            return []
+
+        # Intersect starting from the smallest set.
+        candidates.sort(key=len)
+        keys = set(candidates[0])
+        for other in candidates[1:]:
+            keys &= other
+            if not keys:
+                return []
+
+        return heapq.nlargest(
+            limit, (self._records[key] for key in keys), key=lambda s: s.submission_time or datetime.min
+        )
@@ -0,0 +1,261 @@
+"""Lightweight per-submission tracing.
+
+Each submission gets a trace id and a root span, with child spans for every
+pipeline stage (Telegram get_file and download, Drive create and
+permissions, Sheet append). Spans carry attributes such as bytes transferred
+and retries, and are exported as they finish to a JSON-lines file and,
+optionally, to an OpenTelemetry collector over OTLP/HTTP JSON. Exporters write
+from background threads, so tracing adds no file or network I/O to the loop.
+
+Summarize the slowest stages:
+    python tracing.py summarize [--file state/traces.jsonl] [--since 24h]
+"""
+
+import argparse
+import contextvars
+import json
+import os
+import queue
+import threading
+import time
+import urllib.request
+import uuid
+from collections import defaultdict
+from contextlib import contextmanager
+
+_current_span = contextvars.ContextVar("current_span", default=None)
+
+
+class Span:
+    __slots__ = ("trace_id", "span_id", "parent_id", "name", "start", "end", "attributes", "status")
+
+    def __init__(self, trace_id, parent_id, name, attributes):
+        self.trace_id = trace_id
+        self.span_id = uuid.uuid4().hex[:16]
+        self.parent_id = parent_id
+        self.name = name
+        self.start = time.time()
+        self.end = None
+        self.attributes = attributes
+        self.status = "ok"
+
+    def set(self, **attributes):
+        self.attributes.update(attributes)
+
+    def to_dict(self):
+        return {
+            "trace_id": self.trace_id,
+            "span_id": self.span_id,
+            "parent_id": self.parent_id,
+            "name": self.name,
+            "start": self.start,
+            "duration": self.end - self.start,
+            "status": self.status,
+            "attributes": self.attributes,
+        }
+
+
+class _QueuedExporter:
+    """Hand finished spans to a background thread that writes them out in batches."""
+
+    def __init__(self, thread_name, batch_size=64):
+        self.batch_size = batch_size
+        self._queue = queue.Queue(maxsize=10_000)
+        threading.Thread(target=self._worker, name=thread_name, daemon=True).start()
+
+    def export(self, span):
+        try:
+            self._queue.put_nowait(span)
+        except queue.Full:
+            pass  # Tracing must never slow the bot down
+
+    def _worker(self):
+        while True:
+            spans = [self._queue.get()]
+            while len(spans) < self.batch_size:
+                try:
+                    spans.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            try:
+                self._write(spans)
+            except Exception as e:
+                print(f"{type(self).__name__} error: {e}")
+
+    def _write(self, spans):
+        raise NotImplementedError
+
+
+class JsonLinesExporter(_QueuedExporter):
+    def __init__(self, path):
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self.path = path
+        self._file = open(path, "a", encoding="utf-8")
+        super().__init__("trace-writer")
+
+    def _write(self, spans):
+        self._file.writelines(json.dumps(span.to_dict(), ensure_ascii=False, default=str) + "\n" for span in spans)
+        self._file.flush()
+
+
+class OtlpHttpExporter(_QueuedExporter):
+    """Send spans to an OTLP/HTTP collector (e.g. http://localhost:4318) from a background thread."""
+
+    def __init__(self, endpoint, service_name="telegram-submission-bot", batch_size=64):
+        self.url = endpoint.rstrip("/") + "/v1/traces"
+        self.service_name = service_name
+        super().__init__("otlp-exporter", batch_size)
+
+    @staticmethod
+    def _attribute(key, value):
+        if isinstance(value, bool):
+            return {"key": key, "value": {"boolValue": value}}
+        if isinstance(value, int):
+            return {"key": key, "value": {"intValue": str(value)}}
+        if isinstance(value, float):
+            return {"key": key, "value": {"doubleValue": value}}
+        return {"key": key, "value": {"stringValue": str(value)}}
+
+    def _payload(self, spans):
+        return {
+            "resourceSpans": [
+                {
+                    "resource": {"attributes": [self._attribute("service.name", self.service_name)]},
+                    "scopeSpans": [
+                        {
+                            "scope": {"name": "tracing"},
+                            "spans": [
+                                {
+                                    "traceId": span.trace_id,
+                                    "spanId": span.span_id,
+                                    "parentSpanId": span.parent_id or "",
+                                    "name": span.name,
+                                    "kind": 1,
+                                    "startTimeUnixNano": str(int(span.start * 1e9)),
+                                    "endTimeUnixNano": str(int(span.end * 1e9)),
+                                    "attributes": [self._attribute(k, v) for k, v in span.attributes.items()],
+                                    "status": {"code": 1 if span.status == "ok" else 2},
+                                }
+                                for span in spans
+                            ],
+                        }
+                    ],
+                }
+            ]
+        }
+
+    def _write(self, spans):
+        request = urllib.request.Request(
+            self.url,
+            data=json.dumps(self._payload(spans)).encode(),
+            headers={"Content-Type": "application/json"},
+        )
+        urllib.request.urlopen(request, timeout=10).close()
+
+
+_exporters = []
+
+
+def configure(trace_file=None, otlp_endpoint=None):
+    _exporters.clear()
+    if trace_file:
+        _exporters.append(JsonLinesExporter(trace_file))
+    if otlp_endpoint:
+        _exporters.append(OtlpHttpExporter(otlp_endpoint))
+
+
+@contextmanager
+def trace(name, **attributes):
+    """Start a new trace with a root span; use ``span`` inside it for the stages."""
+    root = Span(uuid.uuid4().hex, None, name, attributes)
+    with _activate(root):
+        yield root
+
+
+@contextmanager
+def span(name, **attributes):
+    """Child span of the current span. Outside a trace it is recorded nowhere."""
+    parent = _current_span.get()
+    if parent is None:
+        yield Span("", None, name, attributes)
+        return
+    with _activate(Span(parent.trace_id, parent.span_id, name, attributes)) as child:
+        yield child
+
+
+@contextmanager
+def _activate(current):
+    token = _current_span.set(current)
+    try:
+        yield current
+    except BaseException as e:
+        current.status = "error"
+        current.attributes.setdefault("error", f"{type(e).__name__}: {e}"[:200])
+        raise
+    finally:
+        _current_span.reset(token)
+        current.end = time.time()
+        for exporter in _exporters:
+            try:
+                exporter.export(current)
+            except Exception as e:
+                print(f"Trace export error: {e}")
+
+
+def _parse_window(value):
+    units = {"s": 1, "m": 60, "h": 3600, "d": 86400}
+    return float(value[:-1]) * units[value[-1]] if value[-1] in units else float(value)
+
+
+def _percentile(values, fraction):
+    return values[min(len(values) - 1, int(fraction * len(values)))]
+
+
+def summarize(path, since_seconds=None, top=5):
+    cutoff = time.time() - since_seconds if since_seconds else 0
+    durations = defaultdict(list)
+    transferred = defaultdict(int)
+    retries = defaultdict(int)
+    errors = defaultdict(int)
+    roots = []
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            record = json.loads(line)
+            if record["start"] < cutoff:
+                continue
+            name = record["name"]
+            durations[name].append(record["duration"])
+            transferred[name] += record["attributes"].get("bytes", 0) or 0
+            retries[name] += record["attributes"].get("retries", 0) or 0
+            errors[name] += record["status"] != "ok"
+            if record["parent_id"] is None:
+                roots.append(record)
+
+    print(f"{'stage':24} {'count':>6} {'p50 s':>8} {'p95 s':>8} {'max s':>8} {'MiB':>8} {'retries':>7} {'errors':>6}")
+    for name, values in sorted(durations.items(), key=lambda item: -_percentile(sorted(item[1]), 0.95)):
+        values.sort()
+        print(
+            f"{name:24} {len(values):6} {_percentile(values, 0.5):8.2f} {_percentile(values, 0.95):8.2f} "
+            f"{values[-1]:8.2f} {transferred[name] / 1024 / 1024:8.1f} {retries[name]:7} {errors[name]:6}"
+        )
+
+    if roots:
+        print("\nSlowest traces:")
+        for record in sorted(roots, key=lambda r: -r["duration"])[:top]:
+            attributes = ", ".join(f"{k}={v}" for k, v in record["attributes"].items())
+            print(f"  {record['trace_id']} {record['name']} {record['duration']:.2f}s ({attributes})")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Summarize submission traces.")
+    commands = parser.add_subparsers(dest="command", required=True)
+    summarize_parser = commands.add_parser("summarize", help="slowest stages over a time window")
+    summarize_parser.add_argument("--file", default=os.path.join(os.getenv("STATE_DIR", "state"), "traces.jsonl"))
+    summarize_parser.add_argument("--since", help="time window such as 30m, 24h or 7d (default: everything)")
+    summarize_parser.add_argument("--top", type=int, default=5, help="number of slowest traces to list")
+    args = parser.parse_args()
+    summarize(args.file, _parse_window(args.since) if args.since else None, args.top)
+
+
+if __name__ == "__main__":
+    main()